@@ -1,7 +1,9 @@
-from typing import Optional
+import os
+from functools import cached_property
+from typing import Callable, List, Literal, Optional, Tuple
 from pydantic import Field, computed_field
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from sqlalchemy import URL
+from sqlalchemy import URL, make_url
 
 
 class DatabaseConfig(BaseSettings):
@@ -11,7 +13,8 @@ class DatabaseConfig(BaseSettings):
         env_file=".env",
         env_file_encoding="utf-8",
         case_sensitive=False,
-        extra="ignore"
+        extra="ignore",
+        frozen=True
     )
     
     host: str = Field(default="localhost", alias="DB_HOST")
@@ -21,16 +24,33 @@ class DatabaseConfig(BaseSettings):
     password: str = Field(default="", alias="DB_PASSWORD")
     driver: str = Field(default="mysql+pymysql", alias="DB_DRIVER")
     database_url: Optional[str] = Field(default=None, alias="DATABASE_URL")
+    # 连接池 (每个工作进程独立)：常驻连接数、额外溢出连接数、获取连接的超时（秒）
+    pool_size: int = Field(default=5, alias="DB_POOL_SIZE")
+    max_overflow: int = Field(default=5, alias="DB_MAX_OVERFLOW")
+    pool_timeout: float = Field(default=10, alias="DB_POOL_TIMEOUT")
+    # 本实例全部工作进程合计的连接数上限，按工作进程数平分后限制每个进程的连接池；0 表示不限制
+    max_connections: int = Field(default=0, alias="DB_MAX_CONNECTIONS")
+    # 连接最长复用时间（秒），需小于 MySQL 的 wait_timeout；-1 表示不回收
+    pool_recycle: int = Field(default=1800, alias="DB_POOL_RECYCLE")
+    # 取出连接时先探测是否可用，避免使用已被服务端断开的连接
+    pool_pre_ping: bool = Field(default=True, alias="DB_POOL_PRE_PING")
+    # 后进先出：低负载时只复用少数连接，其余空闲连接可以被回收
+    pool_use_lifo: bool = Field(default=True, alias="DB_POOL_USE_LIFO")
+    # 只读副本：逗号分隔的连接URL与对应权重 (默认均为 1)
+    replica_urls: str = Field(default="", alias="DB_REPLICA_URLS")
+    replica_weights: str = Field(default="", alias="DB_REPLICA_WEIGHTS")
+    # 副本连接失败后暂停使用的时间（秒）
+    replica_retry_seconds: float = Field(default=30, alias="DB_REPLICA_RETRY_SECONDS")
+    # 用户写入后读请求固定到主库的时间（秒），应大于副本的复制延迟
+    read_your_writes_seconds: float = Field(default=5, alias="DB_READ_YOUR_WRITES_SECONDS")
 
     @computed_field
-    @property
+    @cached_property
     def url(self) -> str:
-        """构建数据库连接URL"""
+        """构建数据库连接URL (只计算一次)"""
         # 优先使用环境变量中的完整URL
         if self.database_url:
-            connection_url = self.database_url
-            print(f"使用环境变量中的完整数据库URL: {self.database_url.replace(self.password, '***') if self.password else self.database_url}")
-            return connection_url
+            return self.database_url
 
         url_obj = URL.create(
             drivername=self.driver,
@@ -40,11 +60,24 @@ class DatabaseConfig(BaseSettings):
             port=self.port,
             database=self.name
         )
-        print(f"数据库连接信息: {self.__str__()}")
-        return str(url_obj)
+        return url_obj.render_as_string(hide_password=False)
+
+    @cached_property
+    def replicas(self) -> List[Tuple[str, int]]:
+        """只读副本的 (连接URL, 权重) 列表"""
+        urls = [url.strip() for url in self.replica_urls.split(",") if url.strip()]
+        weights = [int(weight) for weight in self.replica_weights.split(",") if weight.strip()]
+        if not weights:
+            weights = [1] * len(urls)
+        if len(weights) != len(urls):
+            raise ValueError("DB_REPLICA_WEIGHTS 的数量与 DB_REPLICA_URLS 不一致")
+        return list(zip(urls, weights))
 
     def __str__(self) -> str:
         """返回不包含密码的连接信息"""
+        if self.database_url:
+            return make_url(self.database_url).render_as_string(hide_password=True)
+
         url_obj = URL.create(
             drivername=self.driver,
             username=self.user,
@@ -63,7 +96,8 @@ class OSSConfig(BaseSettings):
         env_file=".env",
         env_file_encoding="utf-8",
         case_sensitive=False,
-        extra="ignore"
+        extra="ignore",
+        frozen=True
     )
     
     access_key_id: str = Field(default="", alias="ALI_AK_ID")
@@ -74,14 +108,55 @@ class OSSConfig(BaseSettings):
     callback_url: str = Field(default="http://127.0.0.1:8000/api/photos/oss-callback", alias="OSS_CALLBACK_URL")
 
 
+class ServerConfig(BaseSettings):
+    """生产环境服务进程配置 (serve.py)"""
+
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        case_sensitive=False,
+        extra="ignore",
+        frozen=True
+    )
+
+    host: str = Field(default="0.0.0.0", alias="SERVER_HOST")
+    port: int = Field(default=8000, alias="SERVER_PORT")
+    # 工作进程数，0 表示 CPU 核数
+    workers: int = Field(default=0, alias="WEB_CONCURRENCY")
+    # 事件循环与 HTTP 解析器，auto 在已安装时使用 uvloop 与 httptools
+    loop: Literal["auto", "asyncio", "uvloop"] = Field(default="auto", alias="SERVER_LOOP")
+    http: Literal["auto", "h11", "httptools"] = Field(default="auto", alias="SERVER_HTTP")
+    # keep-alive 连接空闲超时（秒），位于负载均衡之后时应大于负载均衡的空闲超时
+    keepalive: int = Field(default=5, alias="SERVER_KEEPALIVE")
+    # 监听队列长度
+    backlog: int = Field(default=2048, alias="SERVER_BACKLOG")
+    # 收到退出信号后等待进行中请求完成的时间（秒），超时后强制结束工作进程
+    graceful_timeout: int = Field(default=30, alias="SERVER_GRACEFUL_TIMEOUT")
+    # 工作进程处理的请求数达到上限后重启，加上随机抖动避免同时重启；0 表示不重启
+    max_requests: int = Field(default=0, alias="SERVER_MAX_REQUESTS")
+    max_requests_jitter: int = Field(default=0, alias="SERVER_MAX_REQUESTS_JITTER")
+    # 在主进程中导入应用后再创建工作进程，共享只读内存并加快工作进程启动
+    preload: bool = Field(default=True, alias="SERVER_PRELOAD")
+
+    @property
+    def worker_count(self) -> int:
+        """实际的工作进程数"""
+        return self.workers if self.workers > 0 else os.cpu_count() or 1
+
+
 class AppConfig(BaseSettings):
-    """应用配置类"""
+    """应用配置类
+
+    启动时读取一次环境变量与 .env 生成不可变快照，之后的访问不再读取磁盘。
+    需要重新加载时调用 reload_config()。
+    """
     
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
         case_sensitive=False,
-        extra="ignore"
+        extra="ignore",
+        frozen=True
     )
     
     debug: bool = Field(default=False, alias="DEBUG")
@@ -94,19 +169,68 @@ class AppConfig(BaseSettings):
         default=30, 
         alias="ACCESS_TOKEN_EXPIRE_MINUTES"
     )
+    # bcrypt 哈希线程池：工作线程数与最大排队数，超出排队上限的请求直接返回 503
+    password_hash_workers: int = Field(default=2, alias="PASSWORD_HASH_WORKERS")
+    password_hash_queue_limit: int = Field(default=32, alias="PASSWORD_HASH_QUEUE_LIMIT")
+    # 已认证用户缓存：条目数上限与过期时间（秒）
+    user_cache_size: int = Field(default=1024, alias="USER_CACHE_SIZE")
+    user_cache_ttl_seconds: int = Field(default=60, alias="USER_CACHE_TTL_SECONDS")
+    # 已验证令牌缓存条目数上限，0 表示关闭
+    token_cache_size: int = Field(default=4096, alias="TOKEN_CACHE_SIZE")
+    # 从数据库同步其他进程吊销的令牌的间隔（秒），0 表示不同步 (单进程部署)
+    token_revocation_sync_seconds: float = Field(default=2, alias="TOKEN_REVOCATION_SYNC_SECONDS")
+    # 动物列表/详情响应缓存：条目数上限与过期时间（秒）
+    response_cache_size: int = Field(default=512, alias="RESPONSE_CACHE_SIZE")
+    response_cache_ttl_seconds: int = Field(default=60, alias="RESPONSE_CACHE_TTL_SECONDS")
+    # 动物批量导入每批写入的行数
+    animal_import_batch_size: int = Field(default=500, alias="ANIMAL_IMPORT_BATCH_SIZE")
+    # OSS 回调写入队列：每批条数、最长等待时间（毫秒）、队列上限与本地溢写目录
+    photo_ingest_batch_size: int = Field(default=200, alias="PHOTO_INGEST_BATCH_SIZE")
+    photo_ingest_flush_interval_ms: int = Field(default=200, alias="PHOTO_INGEST_FLUSH_INTERVAL_MS")
+    photo_ingest_max_depth: int = Field(default=10000, alias="PHOTO_INGEST_MAX_DEPTH")
+    photo_ingest_spill_dir: str = Field(default="var/photo_ingest", alias="PHOTO_INGEST_SPILL_DIR")
+    # 已签发 OSS 凭证缓存条目数上限
+    oss_credentials_cache_size: int = Field(default=4096, alias="OSS_CREDENTIALS_CACHE_SIZE")
+    # 慢查询日志阈值（毫秒），0 表示关闭
+    slow_query_ms: int = Field(default=200, alias="SLOW_QUERY_MS")
+    # 单个请求默认允许执行的语句数，路由可用 @query_budget 单独指定；0 表示不检查
+    query_budget: int = Field(default=20, alias="QUERY_BUDGET")
+    # 动物分组计数与 animals 表核对的间隔（秒），0 表示只在启动时核对一次
+    facet_reconcile_interval_seconds: int = Field(default=3600, alias="FACET_RECONCILE_INTERVAL_SECONDS")
+    # 进程内搜索索引 (未使用 MySQL FULLTEXT 时) 的重建间隔（秒），使其他进程对动物的修改和删除生效，0 表示不重建
+    search_index_rebuild_seconds: int = Field(default=300, alias="SEARCH_INDEX_REBUILD_SECONDS")
+    # 启动时的数据库结构检查：migrate 版本不一致时执行迁移，verify 不一致时拒绝启动，off 不检查
+    schema_startup_mode: Literal["migrate", "verify", "off"] = Field(default="migrate", alias="SCHEMA_STARTUP_MODE")
 
-    @computed_field
-    @property
-    def database(self) -> DatabaseConfig:
-        """数据库配置"""
-        return DatabaseConfig()
-
-    @computed_field
-    @property
-    def oss(self) -> OSSConfig:
-        """OSS 配置"""
-        return OSSConfig()
+    # 数据库配置
+    database: DatabaseConfig = Field(default_factory=DatabaseConfig)
+    # OSS 配置
+    oss: OSSConfig = Field(default_factory=OSSConfig)
+    # 服务进程配置
+    server: ServerConfig = Field(default_factory=ServerConfig)
 
 
 # 创建全局配置实例
 config = AppConfig()
+
+# 配置重新加载后需要执行的回调 (例如清空依赖密钥的缓存)
+_reload_hooks: List[Callable[[], None]] = []
+
+
+def on_config_reload(hook: Callable[[], None]) -> None:
+    """注册配置重新加载回调"""
+    _reload_hooks.append(hook)
+
+
+def reload_config() -> AppConfig:
+    """重新读取环境变量与 .env，原地替换全局配置快照
+
+    各模块通过 `from app.config import config` 持有同一个对象，因此这里直接替换其字段，
+    而不是重新绑定模块变量。已经创建的数据库引擎不受影响，数据库配置的修改需要重启进程。
+    """
+    fresh = AppConfig()
+    # 快照是 frozen 的，绕过 __setattr__ 整体替换字段
+    config.__dict__.update(fresh.__dict__)
+    for hook in _reload_hooks:
+        hook()
+    return config
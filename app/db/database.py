@@ -1,14 +1,103 @@
+import logging
+from typing import Tuple
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from app.config import config
 
+logger = logging.getLogger(__name__)
+
 DATABASE_URL = config.database.url
+logger.info(f"数据库连接信息: {config.database}")
+
+# 同步驱动 -> 异步驱动的映射
+ASYNC_DRIVERS = {
+    "mysql": "aiomysql",
+    "sqlite": "aiosqlite",
+}
+
+
+def to_async_url(url: str) -> str:
+    """将同步数据库URL转换为对应的异步驱动URL"""
+    url_obj = make_url(url)
+    backend = url_obj.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"不支持的异步数据库类型: {backend}")
+    return url_obj.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = to_async_url(DATABASE_URL)
+
+
+def pool_limits() -> Tuple[int, int]:
+    """每个工作进程连接池的 (pool_size, max_overflow)
+
+    设置了 DB_MAX_CONNECTIONS 时按工作进程数平分，先保证常驻连接，剩余的作为溢出连接。
+    """
+    database = config.database
+    if database.max_connections <= 0:
+        return database.pool_size, database.max_overflow
+    workers = config.server.worker_count
+    per_worker = database.max_connections // workers
+    if per_worker < 1:
+        logger.warning(f"DB_MAX_CONNECTIONS={database.max_connections} 少于工作进程数 {workers}，每个进程仍使用 1 个连接")
+        per_worker = 1
+    pool_size = min(database.pool_size, per_worker)
+    return pool_size, min(database.max_overflow, per_worker - pool_size)
+
 
-engine = create_engine(DATABASE_URL)
+def engine_options(url: str) -> dict:
+    """按配置生成连接池参数
+
+    只有 QueuePool 类连接池支持大小、溢出和超时参数，SQLite 内存库等使用的其他连接池只设置探活与回收。
+    """
+    database = config.database
+    options = {
+        "pool_pre_ping": database.pool_pre_ping,
+        "pool_recycle": database.pool_recycle,
+    }
+    url_obj = make_url(url)
+    if issubclass(url_obj.get_dialect().get_pool_class(url_obj), QueuePool):
+        pool_size, max_overflow = pool_limits()
+        options.update(
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=database.pool_timeout,
+            pool_use_lifo=database.pool_use_lifo,
+        )
+    return options
+
+
+def pool_stats(engine) -> dict:
+    """连接池当前状态"""
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {}
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+    }
+
+
+# 同步引擎：供脚本 (db_init.py) 及建表使用
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 异步引擎：供路由处理函数使用，避免阻塞事件循环
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL))
+
+# expire_on_commit=False：提交后仍可直接读取对象属性，避免在异步上下文中触发隐式IO
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
 Base = declarative_base()
 
 def get_db():
@@ -18,5 +107,9 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 def create_tables():
     Base.metadata.create_all(bind=engine)
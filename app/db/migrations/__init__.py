@@ -0,0 +1,172 @@
+"""
+数据库迁移
+
+迁移脚本为本包中的 m<revision>_<名称>.py，按 revision 顺序执行其中的 upgrade(conn)。
+已执行的 revision 及执行时模型的结构指纹记录在 schema_migrations 表中，
+应用启动时只需读取一行记录与代码比较，不必反射全部表结构。
+
+用法:
+    python -m app.db.migrations            执行未执行的迁移
+    python -m app.db.migrations --check    只比较版本与结构指纹，不一致时以非零状态退出
+"""
+import hashlib
+import importlib
+import logging
+import pkgutil
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, inspect, select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+import app.models  # noqa: F401  注册全部模型，保证 Base.metadata 完整
+from app.db.database import Base
+
+logger = logging.getLogger(__name__)
+
+version_table = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("revision", String(32), primary_key=True),
+    Column("description", String(255), nullable=True),
+    Column("fingerprint", String(64), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+_MODULE_RE = re.compile(r"m(\d{4})_\w+")
+
+
+class SchemaMismatch(RuntimeError):
+    """数据库记录的结构版本与代码不一致"""
+
+
+def revisions() -> List[Tuple[str, str]]:
+    """按 revision 排序的 (revision, 模块名)，只读取文件名，不导入迁移模块"""
+    found = []
+    for module in pkgutil.iter_modules(__path__):
+        match = _MODULE_RE.fullmatch(module.name)
+        if match:
+            found.append((match.group(1), module.name))
+    return sorted(found)
+
+
+def head() -> Optional[str]:
+    """最新的 revision"""
+    found = revisions()
+    return found[-1][0] if found else None
+
+
+@lru_cache(maxsize=None)
+def fingerprint() -> str:
+    """模型定义的表结构指纹 (表、列、索引、唯一约束与外键)"""
+    parts = []
+    for name in sorted(Base.metadata.tables):
+        table = Base.metadata.tables[name]
+        parts.append(f"table {name}")
+        for column in table.columns:
+            parts.append(f"column {column.name} {column.type} nullable={column.nullable} pk={column.primary_key}")
+        # 索引与约束是无序集合，且可能没有名字，按渲染后的文本排序
+        parts.extend(sorted(
+            f"index {index.name} unique={index.unique} {[column.name for column in index.columns]}"
+            for index in table.indexes
+        ))
+        parts.extend(sorted(
+            f"constraint {type(constraint).__name__} {constraint.name} {[column.name for column in constraint.columns]}"
+            for constraint in table.constraints
+        ))
+        parts.extend(sorted(
+            f"foreign_key {key.parent.name} -> {key.target_fullname} ondelete={key.ondelete}"
+            for key in table.foreign_keys
+        ))
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+
+def stored_state(conn) -> Optional[Tuple[str, str]]:
+    """数据库中记录的最新 (revision, fingerprint)，没有记录时返回 None"""
+    try:
+        row = conn.execute(
+            select(version_table.c.revision, version_table.c.fingerprint)
+            .order_by(version_table.c.revision.desc())
+            .limit(1)
+        ).first()
+    except DBAPIError:
+        # schema_migrations 表不存在
+        return None
+    return tuple(row) if row is not None else None
+
+
+def check(conn) -> Optional[str]:
+    """比较数据库记录的版本与结构指纹，一致时返回 None，否则返回原因"""
+    state = stored_state(conn)
+    if state is None:
+        return "数据库没有结构版本记录"
+    revision, stored = state
+    if revision != head():
+        return f"数据库结构版本 {revision}，代码版本 {head()}"
+    if stored != fingerprint():
+        return "数据库记录的结构指纹与模型不一致"
+    return None
+
+
+def upgrade(conn) -> List[str]:
+    """执行未执行的迁移并记录结构指纹，返回本次处理的 revision
+
+    空数据库直接按模型建表，全部迁移只做记录不执行；
+    已有数据库按顺序执行未执行的迁移，再按模型补建新增的表。
+    没有未执行的迁移但模型结构指纹与记录不一致时抛出 SchemaMismatch，不修改数据库。
+    """
+    existing = set(inspect(conn).get_table_names())
+    version_table.create(conn, checkfirst=True)
+    applied = set(conn.execute(select(version_table.c.revision)).scalars())
+    pending = [(revision, name) for revision, name in revisions() if revision not in applied]
+
+    fresh = not existing.intersection(Base.metadata.tables)
+    latest = head()
+    if not fresh and not pending and latest is not None and stored_state(conn) != (latest, fingerprint()):
+        # 不重新记录指纹：修改已有表的模型必须附带迁移，否则各环境的表结构会与模型不一致且无法发现
+        raise SchemaMismatch(
+            f"模型结构与数据库记录的版本 {latest} 不一致，但没有未执行的迁移；"
+            f"请为模型变更编写新的迁移 (app/db/migrations/m<revision>_<名称>.py)"
+        )
+
+    if fresh:
+        logger.info("空数据库，按模型建表")
+        Base.metadata.create_all(conn)
+
+    now = datetime.utcnow()
+    for revision, name in pending:
+        module = importlib.import_module(f"{__name__}.{name}")
+        if not fresh:
+            logger.info(f"执行迁移 {revision}: {module.description}")
+            module.upgrade(conn)
+        conn.execute(version_table.insert().values(
+            revision=revision, description=module.description, fingerprint=fingerprint(), applied_at=now,
+        ))
+
+    if not fresh:
+        Base.metadata.create_all(conn)
+    return [revision for revision, _ in pending]
+
+
+async def prepare(engine: AsyncEngine, mode: str) -> None:
+    """应用启动时按 mode 检查数据库结构
+
+    - migrate: 版本与指纹一致时只执行一次查询；不一致时执行迁移，模型有变化却没有对应迁移时抛出 SchemaMismatch
+    - verify: 只做比较，不一致时抛出 SchemaMismatch (多进程部署时由发布流程执行迁移)
+    - off: 不检查
+    """
+    if mode == "off":
+        return
+    async with engine.begin() as conn:
+        problem = await conn.run_sync(check)
+        if problem is None:
+            logger.info(f"数据库结构版本 {head()} 与代码一致")
+            return
+        if mode == "verify":
+            raise SchemaMismatch(f"{problem}，请先执行 python -m app.db.migrations")
+        logger.info(f"{problem}，执行迁移")
+        applied = await conn.run_sync(upgrade)
+    logger.info(f"数据库迁移完成: {applied}")
@@ -0,0 +1,37 @@
+import argparse
+import logging
+import sys
+
+from app.db.database import engine
+from app.db.migrations import SchemaMismatch, check, head, upgrade
+
+logger = logging.getLogger(__name__)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.db.migrations", description="执行数据库迁移")
+    parser.add_argument("--check", action="store_true", help="只比较版本与结构指纹，不一致时退出码为 1")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        with engine.connect() as conn:
+            problem = check(conn)
+        if problem is not None:
+            logger.error(problem)
+            return 1
+        logger.info(f"数据库结构版本 {head()} 与代码一致")
+        return 0
+
+    try:
+        with engine.begin() as conn:
+            applied = upgrade(conn)
+    except SchemaMismatch as e:
+        logger.error(e)
+        return 1
+    logger.info(f"迁移完成: {applied or '没有未执行的迁移'}")
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    sys.exit(main())
@@ -0,0 +1,55 @@
+"""
+为 animals 表添加 best_photo_id 冗余字段并回填
+
+- 添加 animals.best_photo_id (MySQL 同时添加外键，删除照片时置空)
+- 回填：每只动物取 id 最大的 best 照片作为最佳照片
+- 清理：其余 best 照片取消标记，保证每只动物最多一张最佳照片
+
+用法:
+    python -m app.db.migrations.m0001_animal_best_photo_id
+"""
+import logging
+from sqlalchemy import inspect, text
+
+logger = logging.getLogger(__name__)
+
+revision = "0001"
+description = "animals.best_photo_id"
+
+
+def upgrade(conn):
+    """执行迁移"""
+    columns = {column["name"] for column in inspect(conn).get_columns("animals")}
+    if "best_photo_id" not in columns:
+        logger.info("添加 animals.best_photo_id 字段")
+        conn.execute(text("ALTER TABLE animals ADD COLUMN best_photo_id INTEGER NULL"))
+        if conn.dialect.name == "mysql":
+            conn.execute(text(
+                "ALTER TABLE animals ADD CONSTRAINT fk_animals_best_photo_id "
+                "FOREIGN KEY (best_photo_id) REFERENCES photos (id) ON DELETE SET NULL"
+            ))
+
+    logger.info("回填 animals.best_photo_id")
+    conn.execute(text(
+        "UPDATE animals SET best_photo_id = ("
+        "SELECT MAX(photos.id) FROM photos "
+        "WHERE photos.animal_id = animals.id AND photos.best = 1"
+        ")"
+    ))
+
+    result = conn.execute(text(
+        "UPDATE photos SET best = 0 WHERE best = 1 AND id NOT IN ("
+        "SELECT best_photo_id FROM animals WHERE best_photo_id IS NOT NULL"
+        ")"
+    ))
+    logger.info(f"取消重复的最佳照片标记: {result.rowcount} 张")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    from app.db.database import engine
+
+    with engine.begin() as conn:
+        upgrade(conn)
+    logger.info("迁移完成")
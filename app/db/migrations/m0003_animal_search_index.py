@@ -0,0 +1,46 @@
+"""
+为 animals 表添加搜索用的 ngram 全文索引
+
+在 (name, nickname, characteristics, campus, area) 上创建 FULLTEXT 索引 ft_animals_search，
+使用 ngram 分词以支持中文。仅 MySQL 5.7.6 及以上执行，其他数据库使用进程内索引，跳过。
+
+用法:
+    python -m app.db.migrations.m0003_animal_search_index
+"""
+import logging
+from sqlalchemy import inspect, text
+
+logger = logging.getLogger(__name__)
+
+revision = "0003"
+description = "ft_animals_search"
+
+INDEX_NAME = "ft_animals_search"
+
+
+def upgrade(conn):
+    """执行迁移"""
+    if conn.dialect.name != "mysql":
+        logger.info(f"{conn.dialect.name} 不支持 FULLTEXT 索引，跳过")
+        return
+
+    indexes = {index["name"] for index in inspect(conn).get_indexes("animals")}
+    if INDEX_NAME in indexes:
+        logger.info(f"索引 {INDEX_NAME} 已存在")
+        return
+
+    logger.info(f"创建索引 {INDEX_NAME}")
+    conn.execute(text(
+        f"CREATE FULLTEXT INDEX {INDEX_NAME} ON animals "
+        "(name, nickname, characteristics, campus, area) WITH PARSER ngram"
+    ))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    from app.db.database import engine
+
+    with engine.begin() as conn:
+        upgrade(conn)
+    logger.info("迁移完成")
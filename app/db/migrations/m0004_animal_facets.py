@@ -0,0 +1,52 @@
+"""
+创建动物分组计数表 animal_facets 并按 animals 表回填
+
+表已存在时跳过；之后的计数偏差由应用启动时及定期的核对任务修正。
+
+用法:
+    python -m app.db.migrations.m0004_animal_facets
+"""
+import logging
+from sqlalchemy import MetaData, Table, func, inspect, insert, select
+
+from app.models.animal_facet import AnimalFacet
+from app.utils.animal_facets import FACETS, encode_value
+
+logger = logging.getLogger(__name__)
+
+revision = "0004"
+description = "animal_facets"
+
+
+def upgrade(conn):
+    """执行迁移"""
+    if inspect(conn).has_table(AnimalFacet.__tablename__):
+        logger.info(f"表 {AnimalFacet.__tablename__} 已存在")
+        return
+
+    logger.info(f"创建表 {AnimalFacet.__tablename__}")
+    AnimalFacet.__table__.create(conn)
+
+    animals = Table("animals", MetaData(), autoload_with=conn)
+    counts = {}
+    for facet in FACETS:
+        column = animals.c[facet]
+        for value, count in conn.execute(select(column, func.count()).group_by(column)):
+            key = (facet, encode_value(value))
+            counts[key] = counts.get(key, 0) + count
+    if counts:
+        conn.execute(
+            insert(AnimalFacet.__table__),
+            [{"facet": facet, "value": value, "count": count} for (facet, value), count in counts.items()],
+        )
+    logger.info(f"回填 {len(counts)} 项分组计数")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    from app.db.database import engine
+
+    with engine.begin() as conn:
+        upgrade(conn)
+    logger.info("迁移完成")
@@ -0,0 +1,50 @@
+"""
+创建已吊销令牌表 revoked_tokens
+
+表已存在时跳过。
+
+用法:
+    python -m app.db.migrations.m0005_revoked_tokens
+"""
+import logging
+from sqlalchemy import Column, DateTime, Double, Index, Integer, MetaData, String, Table, inspect
+
+logger = logging.getLogger(__name__)
+
+revision = "0005"
+description = "revoked_tokens"
+
+# 按本迁移编写时的结构建表，不随之后的模型修改变化
+revoked_tokens = Table(
+    "revoked_tokens",
+    MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("jti", String(64), nullable=True),
+    Column("sub", String(100), nullable=True),
+    # 双精度：MySQL 的 FLOAT 为单精度，无法精确保存当前时间戳
+    Column("issued_before", Double, nullable=True),
+    Column("expires_at", DateTime, nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    Index("ix_revoked_tokens_expires_at", "expires_at"),
+    Index("ix_revoked_tokens_created_at", "created_at"),
+)
+
+
+def upgrade(conn):
+    """执行迁移"""
+    if inspect(conn).has_table(revoked_tokens.name):
+        logger.info(f"表 {revoked_tokens.name} 已存在")
+        return
+
+    logger.info(f"创建表 {revoked_tokens.name}")
+    revoked_tokens.create(conn)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    from app.db.database import engine
+
+    with engine.begin() as conn:
+        upgrade(conn)
+    logger.info("迁移完成")
@@ -0,0 +1,40 @@
+"""
+为 photos 表添加 (animal_id, created_at, id) 复合索引
+
+GET /api/animals/{animal_id}/photos 不按 verified 过滤时，
+(animal_id, verified, created_at, id) 索引无法提供按时间倒序的顺序，需要对该动物的全部照片排序。
+
+用法:
+    python -m app.db.migrations.m0006_photo_created_index
+"""
+import logging
+from sqlalchemy import Index, MetaData, Table, inspect
+
+logger = logging.getLogger(__name__)
+
+revision = "0006"
+description = "ix_photos_animal_created"
+
+INDEX_NAME = "ix_photos_animal_created"
+
+
+def upgrade(conn):
+    """执行迁移"""
+    indexes = {index["name"] for index in inspect(conn).get_indexes("photos")}
+    if INDEX_NAME in indexes:
+        logger.info(f"索引 {INDEX_NAME} 已存在")
+        return
+
+    photos = Table("photos", MetaData(), autoload_with=conn)
+    logger.info(f"创建索引 {INDEX_NAME}")
+    Index(INDEX_NAME, photos.c.animal_id, photos.c.created_at, photos.c.id).create(conn)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    from app.db.database import engine
+
+    with engine.begin() as conn:
+        upgrade(conn)
+    logger.info("迁移完成")
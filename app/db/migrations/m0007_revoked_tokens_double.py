@@ -0,0 +1,42 @@
+"""
+将 revoked_tokens.issued_before 改为双精度
+
+早期的 0005 迁移按 FLOAT 建列，MySQL 中为单精度，时间戳只能精确到约 128 秒，
+退出所有设备后不久签发的新令牌可能被误判为已吊销。SQLite 的 REAL 本身是双精度，跳过。
+
+用法:
+    python -m app.db.migrations.m0007_revoked_tokens_double
+"""
+import logging
+from sqlalchemy import inspect, text
+from sqlalchemy.dialects.mysql import DOUBLE
+
+logger = logging.getLogger(__name__)
+
+revision = "0007"
+description = "revoked_tokens.issued_before DOUBLE"
+
+
+def upgrade(conn):
+    """执行迁移"""
+    if conn.dialect.name != "mysql":
+        logger.info(f"{conn.dialect.name} 的浮点列已是双精度，跳过")
+        return
+
+    columns = {column["name"]: column for column in inspect(conn).get_columns("revoked_tokens")}
+    if isinstance(columns["issued_before"]["type"], DOUBLE):
+        logger.info("revoked_tokens.issued_before 已是 DOUBLE")
+        return
+
+    logger.info("修改 revoked_tokens.issued_before 为 DOUBLE")
+    conn.execute(text("ALTER TABLE revoked_tokens MODIFY issued_before DOUBLE NULL"))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    from app.db.database import engine
+
+    with engine.begin() as conn:
+        upgrade(conn)
+    logger.info("迁移完成")
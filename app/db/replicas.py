@@ -0,0 +1,247 @@
+import logging
+import math
+import time
+from typing import List, Optional, Tuple, Union
+
+from fastapi import Request
+from jose import JWTError
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine, make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+
+from app.config import config
+from app.db.database import async_engine, engine_options, to_async_url
+from app.utils.auth import decode_access_token
+from app.utils.cache import TTLCache
+from app.utils.metrics import current_request
+
+logger = logging.getLogger(__name__)
+
+# 记录最近写入过的用户数上限
+PINNED_USERS_MAXSIZE = 10000
+# 写入后在此时间戳 (秒) 之前读取主库，由 Cookie 带回，任何工作进程都能识别
+PIN_COOKIE = "read_primary_until"
+# 请求中提交了写入时在 ASGI scope 中的标记，由 ReadYourWritesMiddleware 设置 Cookie
+PIN_SCOPE_KEY = "anilog.wrote"
+
+
+class Replica:
+    """一个只读副本及其平滑加权轮询状态"""
+
+    def __init__(self, name: str, engine: AsyncEngine, weight: int):
+        self.name = name
+        self.engine = engine
+        self.weight = weight
+        self.current_weight = 0
+        self.unhealthy_until = 0.0
+        self.reads = 0
+        self.failures = 0
+
+
+class ReplicaRouter:
+    """只读请求的数据库路由
+
+    - 按权重平滑轮询各副本，连接失败的副本在 retry_seconds 内不再使用，读请求改走主库
+    - 提交写入后的 pin_seconds 内，该客户端的读请求固定走主库，保证读到自己的写入：
+      响应设置 Cookie，各工作进程都能识别；不保存 Cookie 的客户端按令牌中的用户在当前进程内记录
+    """
+
+    def __init__(self, replicas: List[Tuple[str, int]], retry_seconds: float, pin_seconds: float):
+        self.replicas = []
+        for i, (url, weight) in enumerate(replicas):
+            async_url = to_async_url(url)
+            engine = create_async_engine(async_url, **engine_options(async_url))
+            self.replicas.append(Replica(f"replica{i}", engine, weight))
+        self.retry_seconds = retry_seconds
+        self._pinned = TTLCache(maxsize=PINNED_USERS_MAXSIZE, ttl=pin_seconds)
+        self.primary_reads = 0
+        self.pinned_reads = 0
+
+    def choose(self) -> Optional[Replica]:
+        """平滑加权轮询选出一个健康的副本，没有可用副本时返回 None"""
+        now = time.monotonic()
+        best = None
+        total = 0
+        for replica in self.replicas:
+            if replica.unhealthy_until > now:
+                continue
+            replica.current_weight += replica.weight
+            total += replica.weight
+            if best is None or replica.current_weight > best.current_weight:
+                best = replica
+        if best is not None:
+            best.current_weight -= total
+        return best
+
+    def mark_unhealthy(self, replica: Replica, error: Exception) -> None:
+        replica.failures += 1
+        replica.unhealthy_until = time.monotonic() + self.retry_seconds
+        logger.warning(f"只读副本 {replica.name} 不可用，{self.retry_seconds} 秒内改用主库: {error}")
+
+    def bind_for_read(self, pinned: bool) -> Union[Engine, Connection]:
+        """选择只读会话使用的引擎或连接
+
+        在会话第一次执行语句时调用 (位于异步会话的 greenlet 中，可以直接使用同步接口建立连接)。
+        使用副本时直接取出会话要用的连接 (取出时由 pool_pre_ping 检查)，连接失败时回退到主库，
+        每个请求只取出一次连接。
+        """
+        replica = None
+        if pinned:
+            self.pinned_reads += 1
+        else:
+            replica = self.choose()
+
+        if replica is not None:
+            try:
+                connection = replica.engine.sync_engine.connect()
+            except (DBAPIError, OSError) as e:
+                self.mark_unhealthy(replica, e)
+            else:
+                replica.reads += 1
+                return connection
+
+        self.primary_reads += 1
+        return async_engine.sync_engine
+
+    def pin(self, subject: str) -> None:
+        self._pinned.set(subject, True)
+
+    def is_pinned(self, subject: str) -> bool:
+        return self._pinned.get(subject) is not None
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        stats = {
+            "replicas": len(self.replicas),
+            "healthy": sum(replica.unhealthy_until <= now for replica in self.replicas),
+            "primary_reads": self.primary_reads,
+            "pinned_reads": self.pinned_reads,
+            "pinned_users": len(self._pinned),
+        }
+        for replica in self.replicas:
+            stats[f"{replica.name}_reads"] = replica.reads
+            stats[f"{replica.name}_failures"] = replica.failures
+        return stats
+
+
+replica_router = ReplicaRouter(
+    config.database.replicas,
+    retry_seconds=config.database.replica_retry_seconds,
+    pin_seconds=config.database.read_your_writes_seconds,
+)
+for _url, _weight in config.database.replicas:
+    logger.info(f"只读副本: {make_url(_url).render_as_string(hide_password=True)} (权重 {_weight})")
+
+
+def request_subject(request: Request) -> Optional[str]:
+    """请求令牌中的用户标识 (邮箱)，与 get_token_from_request 使用相同的令牌来源"""
+    token = request.cookies.get("session_token")
+    if not token:
+        scheme, _, credentials = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not credentials:
+            return None
+        token = credentials
+    try:
+        return decode_access_token(token).get("sub")
+    except JWTError:
+        return None
+
+
+def reads_primary(request: Request) -> bool:
+    """请求是否应读取主库 (刚提交过写入)，未配置副本时总是 False"""
+    if not replica_router.replicas:
+        return False
+    try:
+        until = float(request.cookies.get(PIN_COOKIE, 0))
+    except ValueError:
+        until = 0
+    if until > time.time():
+        return True
+    subject = request_subject(request)
+    return subject is not None and replica_router.is_pinned(subject)
+
+
+class ReadSession(Session):
+    """只读会话：第一次执行语句时才选择副本并取得连接，命中响应缓存的请求不占用连接"""
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        bind = self.info.get("read_bind")
+        if bind is None:
+            bind = self.info["read_bind"] = replica_router.bind_for_read(self.info.get("pinned", False))
+        return bind
+
+    def close(self) -> None:
+        super().close()
+        # 副本连接由 bind_for_read 取出，会话只在其上开启事务，需要在这里归还连接池
+        bind = self.info.pop("read_bind", None)
+        if isinstance(bind, Connection):
+            bind.close()
+
+
+ReadSessionLocal = async_sessionmaker(sync_session_class=ReadSession, autoflush=False, expire_on_commit=False)
+
+
+async def get_read_db(request: Request):
+    """只读会话：优先使用副本，未配置副本、副本不可用或刚写入过时使用主库"""
+    async with ReadSessionLocal(info={"pinned": reads_primary(request)}) as db:
+        yield db
+
+
+class ReadYourWritesMiddleware:
+    """请求中提交了写入时设置 Cookie，之后 pin_seconds 内该客户端在任何工作进程上都读取主库"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not replica_router.replicas:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and scope.get(PIN_SCOPE_KEY):
+                seconds = config.database.read_your_writes_seconds
+                cookie = (
+                    f"{PIN_COOKIE}={time.time() + seconds:.3f}; Max-Age={math.ceil(seconds)}; "
+                    f"Path=/; HttpOnly; SameSite=Lax"
+                )
+                message["headers"] = [*message.get("headers", []), (b"set-cookie", cookie.encode())]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+# 记录会话中的写入，提交后将当前请求的用户固定到主库
+@event.listens_for(Session, "after_flush")
+def _mark_flush(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_bulk_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["wrote"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _pin_writer(session):
+    if not session.info.pop("wrote", False) or not replica_router.replicas:
+        return
+    stats = current_request.get()
+    if stats is None:
+        return
+    stats.scope[PIN_SCOPE_KEY] = True
+    subject = request_subject(Request(stats.scope))
+    if subject is not None:
+        replica_router.pin(subject)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_write(session):
+    session.info.pop("wrote", None)
@@ -0,0 +1,43 @@
+from sqlalchemy import Table
+
+# 方言模块在分支内导入：只加载实际使用的数据库方言，缩短启动时间
+
+
+def insert_ignore_duplicates(table: Table, dialect_name: str):
+    """构造遇到唯一键冲突时跳过该行的 INSERT 语句
+
+    - MySQL: INSERT ... ON DUPLICATE KEY UPDATE id = id (不会像 INSERT IGNORE 那样吞掉外键等其他错误)
+    - SQLite: INSERT ... ON CONFLICT DO NOTHING
+    """
+    if dialect_name == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+        stmt = mysql_insert(table)
+        return stmt.on_duplicate_key_update(id=table.c.id)
+    if dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+        return sqlite_insert(table).on_conflict_do_nothing()
+    raise ValueError(f"不支持的数据库类型: {dialect_name}")
+
+
+def insert_or_increment(table: Table, dialect_name: str, column: str):
+    """构造按主键累加计数的 INSERT 语句，行不存在时插入
+
+    - MySQL: INSERT ... ON DUPLICATE KEY UPDATE column = column + VALUES(column)
+    - SQLite: INSERT ... ON CONFLICT (主键) DO UPDATE SET column = column + excluded.column
+    """
+    if dialect_name == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+        stmt = mysql_insert(table)
+        return stmt.on_duplicate_key_update({column: table.c[column] + stmt.inserted[column]})
+    if dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+        stmt = sqlite_insert(table)
+        return stmt.on_conflict_do_update(
+            index_elements=list(table.primary_key.columns),
+            set_={column: table.c[column] + stmt.excluded[column]},
+        )
+    raise ValueError(f"不支持的数据库类型: {dialect_name}")
@@ -1,3 +1,8 @@
 from app.models.user import User
 from app.models.animal import Animal
 from app.models.photo import Photo
+from app.models.animal_facet import AnimalFacet
+from app.models.revoked_token import RevokedToken
+
+# 维护分组计数的 ORM 事件随模型一起注册：只导入 app.models 的脚本写入动物时计数同样更新
+import app.utils.animal_facets  # noqa: F401
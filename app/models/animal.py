@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship # 导入 relationship
 
@@ -6,6 +6,13 @@ from app.db.database import Base
 
 class Animal(Base):
     __tablename__ = "animals"
+    __table_args__ = (
+        # 搜索用的 ngram 全文索引，仅 MySQL 创建 (SQLite 使用进程内索引)
+        Index(
+            "ft_animals_search", "name", "nickname", "characteristics", "campus", "area",
+            mysql_prefix="FULLTEXT", mysql_with_parser="ngram",
+        ).ddl_if(dialect="mysql"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), index=True, unique=True)
@@ -16,8 +23,14 @@ class Animal(Base):
     area = Column(String(50), nullable=True)
     habit = Column(Text, nullable=True)
     is_active = Column(Boolean, default=True)
+    # 最佳照片 (冗余字段，由设置最佳照片的写路径在同一事务中维护，读取时无需再关联 photos 表)
+    best_photo_id = Column(
+        Integer,
+        ForeignKey("photos.id", use_alter=True, name="fk_animals_best_photo_id", ondelete="SET NULL"),
+        nullable=True
+    )
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # 添加与 Photo 模型的关系
-    photos = relationship("Photo", back_populates="animal")
+    photos = relationship("Photo", back_populates="animal", foreign_keys="Photo.animal_id")
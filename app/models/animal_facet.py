@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String
+
+from app.db.database import Base
+
+class AnimalFacet(Base):
+    """按 campus / area / gender / is_active 分组的动物数量
+
+    由动物的写路径在同一事务中增量维护，并定期与 animals 表核对修正。
+    value 为字段值的字符串形式，空值存为空字符串。
+    """
+    __tablename__ = "animal_facets"
+
+    facet = Column(String(20), primary_key=True)
+    value = Column(String(50), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
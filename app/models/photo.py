@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -6,6 +6,12 @@ from app.db.database import Base
 
 class Photo(Base):
     __tablename__ = "photos"
+    __table_args__ = (
+        # 按动物分页列出照片 (按时间倒序) 时按索引顺序读取，不需要排序；
+        # 按 verified 过滤时使用前者，不过滤时使用后者
+        Index("ix_photos_animal_verified_created", "animal_id", "verified", "created_at", "id"),
+        Index("ix_photos_animal_created", "animal_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     animal_id = Column(Integer, ForeignKey("animals.id"), index=True) # 外键关联 Animal 表
@@ -19,5 +25,5 @@ class Photo(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # 建立与 Animal 和 User 模型的关系
-    animal = relationship("Animal", back_populates="photos")
+    animal = relationship("Animal", back_populates="photos", foreign_keys=[animal_id])
     uploader = relationship("User", back_populates="photos")
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, DateTime, Double, Integer, String
+
+from app.db.database import Base
+
+class RevokedToken(Base):
+    """已吊销的访问令牌
+
+    每行是以下两种之一:
+      - jti 非空：吊销单个令牌 (登出)
+      - sub 与 issued_before 非空：吊销该用户 issued_before 之前签发的全部令牌 (退出所有设备)
+    expires_at 之后被吊销的令牌本身已过期，记录可以删除。
+    """
+    __tablename__ = "revoked_tokens"
+
+    id = Column(Integer, primary_key=True)
+    jti = Column(String(64), nullable=True)
+    sub = Column(String(100), nullable=True)
+    # 令牌 iat 的时间戳 (秒，可带小数)，与 iat 直接比较
+    # 必须是双精度：MySQL 的 FLOAT 为单精度，当前时间戳只能精确到约 128 秒
+    issued_before = Column(Double, nullable=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    created_at = Column(DateTime, nullable=False, index=True)
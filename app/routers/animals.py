@@ -1,17 +1,59 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_
-from typing import List
+import io
+from datetime import datetime
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import String, Text, and_, cast, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+from typing import List, Optional, Tuple
 
-from app.db.database import get_db
+from app.config import config
+from app.db.database import get_async_db
+from app.db.replicas import get_read_db, reads_primary
 from app.models.user import User
 from app.models.animal import Animal
 from app.models.photo import Photo
-from app.schemas.animal import AnimalCreate, Animal as AnimalSchema
+from app.schemas.animal import (
+    AnimalCreate, Animal as AnimalSchema, AnimalFacets, AnimalFields, AnimalImportResult, BestPhotoUpdate,
+)
+from app.schemas.photo import Photo as PhotoSchema
 from app.routers.auth import get_current_user, get_required_user
+from app.utils.known_animals import known_animals
+from app.utils.animal_import import IMPORT_FORMATS, detect_format, import_animals, read_rows
+from app.utils.animal_search import animal_search
+from app.utils.animal_facets import read_facets
+from app.utils.pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from app.utils.query_monitor import query_budget
+from app.utils.response_cache import ResponseCache
+from app.utils.serialization import dumps, parse_fields, rows_to_dicts, schema_columns
 
 router = APIRouter()
 
+# 动物列表/详情的响应缓存，所有写操作提交后失效
+# 刚写入的客户端读取主库，不使用缓存；配置了只读副本时，失效后等待复制完成再缓存
+response_cache = ResponseCache(
+    maxsize=config.response_cache_size,
+    ttl=config.response_cache_ttl_seconds,
+    bypass=reads_primary,
+    settle_seconds=config.database.read_your_writes_seconds if config.database.replicas else 0,
+)
+# 列表、搜索、详情直接返回序列化后的 JSON (不经过 response_model)，OpenAPI 中按 fields= 选取字段的结构说明
+NOT_MODIFIED = {304: {"description": "If-None-Match 与当前 ETag 相同，响应未修改"}}
+ANIMAL_LIST_RESPONSES = {200: {"model": List[AnimalFields]}, **NOT_MODIFIED}
+ANIMAL_DETAIL_RESPONSES = {200: {"model": AnimalFields}, 404: {"description": "动物不存在"}, **NOT_MODIFIED}
+
+# 动物字段对应的列，best_photo 由 LEFT JOIN 最佳照片得到
+# gender 列为整数，AnimalSchema 中为字符串，在 SQL 中转换
+ANIMAL_COLUMNS = schema_columns(
+    AnimalSchema, Animal, exclude=("best_photo",), overrides={"gender": cast(Animal.gender, String)}
+)
+ANIMAL_FIELDS = (*ANIMAL_COLUMNS, "best_photo")
+# 列表默认不返回不限长度的 Text 列 (characteristics, habit)，需要时通过 fields= 指定
+ANIMAL_LIST_DEFAULT_FIELDS = tuple(
+    name for name in ANIMAL_FIELDS if name == "best_photo" or not isinstance(ANIMAL_COLUMNS[name].type, Text)
+)
+BEST_PHOTO_COLUMNS = {key: column.label(f"photo_{key}") for key, column in schema_columns(PhotoSchema, Photo).items()}
+
 # 权限检查函数
 def check_manager_permission(current_user: User = Depends(get_required_user)):
     """检查当前用户是否有 manager >= 3 的权限"""
@@ -23,22 +65,73 @@ def check_manager_permission(current_user: User = Depends(get_required_user)):
         )
     return current_user
 
+def parse_animal_fields(fields: Optional[str], default=ANIMAL_FIELDS) -> Tuple[str, ...]:
+    """解析 fields= 参数，字段名不正确时返回 400"""
+    try:
+        return parse_fields(fields, ANIMAL_FIELDS, default)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def select_animal_fields(keys: Tuple[str, ...]):
+    """只选取请求字段对应的列，请求 best_photo 时 LEFT JOIN 最佳照片"""
+    query = select(*(ANIMAL_COLUMNS[key] for key in keys if key != "best_photo"))
+    if "best_photo" in keys:
+        query = query.add_columns(*BEST_PHOTO_COLUMNS.values()).outerjoin(Photo, Photo.id == Animal.best_photo_id)
+    return query
+
+async def read_animal_row(db: AsyncSession, animal_id: int) -> dict:
+    """写操作提交后读取动物的全部字段 (含最佳照片)，一条语句代替 refresh 与读取最佳照片"""
+    result = await db.execute(select_animal_fields(ANIMAL_FIELDS).filter(Animal.id == animal_id))
+    return animal_rows_to_dicts(result.all(), ANIMAL_FIELDS)[0]
+
+def photo_page_query(animal_id: int, verified: Optional[bool] = None):
+    """某只动物的照片ID与上传时间，按上传时间倒序
+
+    过滤 verified 时使用 (animal_id, verified, created_at, id) 索引，否则使用 (animal_id, created_at, id) 索引，
+    两种情况都按索引顺序读取，不需要排序。
+    """
+    query = select(Photo.id, Photo.created_at).filter(Photo.animal_id == animal_id)
+    if verified is not None:
+        query = query.filter(Photo.verified == verified)
+    return query.order_by(Photo.created_at.desc(), Photo.id.desc())
+
+def animal_rows_to_dicts(rows, keys: Tuple[str, ...]) -> List[dict]:
+    """由列元组组装响应，不逐行构造 AnimalSchema，也不经过 response_model 再次校验"""
+    if "best_photo" not in keys:
+        return rows_to_dicts(rows, keys)
+    # best_photo 总是最后一个字段，其后为照片各列
+    split = len(keys) - 1
+    photo_id = split + tuple(BEST_PHOTO_COLUMNS).index("id")
+    result = []
+    for row in rows:
+        animal = dict(zip(keys, row[:split]))
+        animal["best_photo"] = dict(zip(BEST_PHOTO_COLUMNS, row[split:])) if row[photo_id] is not None else None
+        result.append(animal)
+    return result
+
+# 查询预算是各路由应执行的语句数，注释逐条列出；用户缓存未命中时认证读取用户计为 1 条。
+# 修改路由的查询时同时修改预算与注释，超出预算说明出现了多余的查询 (例如 N+1)
+# 认证、检查重名、INSERT、分组计数、refresh
 @router.post("/", response_model=AnimalSchema, status_code=status.HTTP_201_CREATED)
+@query_budget(5)
 async def create_animal(
     animal: AnimalCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(check_manager_permission)
 ):
     """创建新动物 (需要管理员权限)"""
     # 检查动物名是否已存在
-    db_animal = db.query(Animal).filter(Animal.name == animal.name).first()
+    result = await db.execute(select(Animal).filter(Animal.name == animal.name))
+    db_animal = result.scalars().first()
     if db_animal:
         raise HTTPException(status_code=400, detail="动物名已被使用")
 
     db_animal = Animal(**animal.dict())
     db.add(db_animal)
-    db.commit()
-    db.refresh(db_animal)
+    await db.commit()
+    await db.refresh(db_animal)
+    response_cache.invalidate()
+    known_animals.add(db_animal.id)
     
     # 新创建的动物没有照片，best_photo为None
     animal_data = AnimalSchema.from_orm(db_animal)
@@ -46,94 +139,309 @@ async def create_animal(
     
     return animal_data
 
-@router.get("/", response_model=List[AnimalSchema])
+# 导入的语句数随文件大小增长，不限制查询预算
+@router.post("/import", response_model=AnimalImportResult)
+@query_budget(0)
+async def import_animals_file(
+    file: UploadFile = File(...),
+    format: Optional[str] = None,
+    batch_size: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(check_manager_permission)
+):
+    """批量导入动物 (需要管理员权限)
+
+    - file: CSV (首行为表头) 或 JSON Lines 文件，字段与创建动物接口一致
+    - format: csv / jsonl，默认根据文件扩展名判断
+    - batch_size: 每批写入的行数
+
+    逐批校验并写入，返回逐行错误报告，失败的行不影响其他行。
+    """
+    fmt = format or detect_format(file.filename)
+    if fmt not in set(IMPORT_FORMATS.values()):
+        raise HTTPException(status_code=400, detail="无法识别的文件格式，请指定 format=csv 或 format=jsonl")
+
+    batch_size = batch_size or config.animal_import_batch_size
+    if batch_size < 1:
+        raise HTTPException(status_code=400, detail="batch_size 必须大于 0")
+
+    text = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        result = await import_animals(db, read_rows(text, fmt), batch_size)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="文件必须为 UTF-8 编码")
+    finally:
+        text.detach()
+
+    if result.inserted:
+        response_cache.invalidate()
+    return result
+
+# 认证、列表
+@router.get("/", response_class=ORJSONResponse, responses=ANIMAL_LIST_RESPONSES)
+@query_budget(2)
 async def read_animals(
-    skip: int = 0,
-    limit: int = 10,
-    db: Session = Depends(get_db),
+    request: Request,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_required_user)
 ):
-    """获取动物列表"""
-    # 使用左连接获取动物和其最佳照片
-    animals_with_photos = db.query(Animal, Photo).outerjoin(
-        Photo, and_(Animal.id == Photo.animal_id, Photo.best == True)
-    ).offset(skip).limit(limit).all()
-    
-    result = []
-    for animal, best_photo in animals_with_photos:
-        animal_data = AnimalSchema.from_orm(animal)
-        animal_data.best_photo = best_photo
-        result.append(animal_data)
-    
-    return result
+    """获取动物列表
+
+    - cursor: 上一页响应头 X-Next-Cursor 中的游标，按 id 索引定位，提供时忽略 skip
+    - fields: 逗号分隔的返回字段，总是包含 id；默认不含 characteristics 与 habit
+    """
+    cache_key = response_cache.key(request)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached.to_response(request)
+
+    keys = parse_animal_fields(fields, ANIMAL_LIST_DEFAULT_FIELDS)
+    query = select_animal_fields(keys).order_by(Animal.id)
+
+    if cursor is not None:
+        try:
+            (last_id,) = decode_cursor(cursor, int)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        query = query.filter(Animal.id > last_id)
+    else:
+        query = query.offset(skip)
+
+    result = await db.execute(query.limit(limit))
+    rows = result.all()
+
+    headers = {}
+    if rows and len(rows) == limit:
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1].id)
+
+    cached = response_cache.put(cache_key, dumps(animal_rows_to_dicts(rows, keys)), headers)
+    return cached.to_response(request)
+
+# 认证、分组计数
+@router.get("/facets", response_model=AnimalFacets)
+@query_budget(2)
+async def read_animal_facets(
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_required_user)
+):
+    """按校区、区域、性别、是否活跃分组的动物数量 (读取增量维护的计数表)"""
+    cache_key = response_cache.key(request)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached.to_response(request)
+
+    facets = AnimalFacets(**await read_facets(db))
+    cached = response_cache.put(cache_key, facets.model_dump_json().encode())
+    return cached.to_response(request)
+
+# 认证、补充索引、读取动物 (LEFT JOIN 最佳照片)；构建索引是一次性的，不计入请求
+@router.get("/search", response_class=ORJSONResponse, responses=ANIMAL_LIST_RESPONSES)
+@query_budget(3)
+async def search_animals(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=100, pattern=r"\S"),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_required_user)
+):
+    """搜索动物
 
-@router.get("/{animal_id}", response_model=AnimalSchema)
+    - q: 在名字、昵称、特征、校区、区域中搜索，多个词以空格分隔，需全部出现
+    - 按相关度排序，名字/昵称命中的排在前面
+    - fields: 逗号分隔的返回字段，与列表相同
+    """
+    cache_key = response_cache.key(request)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached.to_response(request)
+
+    keys = parse_animal_fields(fields, ANIMAL_LIST_DEFAULT_FIELDS)
+    rows = await animal_search.search(db, q, limit, select_animal_fields(keys))
+    cached = response_cache.put(cache_key, dumps(animal_rows_to_dicts(rows, keys)))
+    return cached.to_response(request)
+
+# 认证、动物
+@router.get("/{animal_id}", response_class=ORJSONResponse, responses=ANIMAL_DETAIL_RESPONSES)
+@query_budget(2)
 async def read_animal(
     animal_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_required_user)
 ):
-    """获取指定动物"""
-    # 使用左连接获取动物和其最佳照片
-    result = db.query(Animal, Photo).outerjoin(
-        Photo, and_(Animal.id == Photo.animal_id, Photo.best == True)
-    ).filter(Animal.id == animal_id).first()
-    
-    if result is None:
+    """获取指定动物
+
+    - fields: 逗号分隔的返回字段，总是包含 id；默认返回全部字段
+    """
+    cache_key = response_cache.key(request)
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached.to_response(request)
+
+    keys = parse_animal_fields(fields)
+    result = await db.execute(select_animal_fields(keys).filter(Animal.id == animal_id))
+    rows = result.all()
+
+    if not rows:
         raise HTTPException(status_code=404, detail="动物不存在")
-    
-    animal, best_photo = result
-    animal_data = AnimalSchema.from_orm(animal)
-    animal_data.best_photo = best_photo
-    
-    return animal_data
 
+    cached = response_cache.put(cache_key, dumps(animal_rows_to_dicts(rows, keys)[0]))
+    return cached.to_response(request)
+
+# 认证、动物的最佳照片ID、照片ID分页、照片
+@router.get("/{animal_id}/photos", response_model=List[PhotoSchema])
+@query_budget(4)
+async def read_animal_photos(
+    animal_id: int,
+    response: Response,
+    verified: Optional[bool] = None,
+    best: Optional[bool] = None,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_required_user)
+):
+    """获取指定动物的照片列表 (按上传时间倒序)
+
+    - verified / best: 按是否已验证、是否最佳照片过滤
+    - cursor: 上一页响应头 X-Next-Cursor 中的游标
+    """
+    result = await db.execute(select(Animal.best_photo_id).filter(Animal.id == animal_id))
+    row = result.first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="动物不存在")
+    best_photo_id = row.best_photo_id
+
+    # 先在索引上定位这一页的照片ID，再按主键取整行
+    page_query = photo_page_query(animal_id, verified)
+    # 最佳照片由 Animal.best_photo_id 唯一确定
+    if best is True:
+        if best_photo_id is None:
+            return []
+        page_query = page_query.filter(Photo.id == best_photo_id)
+    elif best is False and best_photo_id is not None:
+        page_query = page_query.filter(Photo.id != best_photo_id)
+
+    if cursor is not None:
+        try:
+            last_created_at, last_id = decode_cursor(cursor, datetime, int)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        page_query = page_query.filter(or_(
+            Photo.created_at < last_created_at,
+            and_(Photo.created_at == last_created_at, Photo.id < last_id)
+        ))
+
+    result = await db.execute(page_query.limit(limit))
+    page = result.all()
+    if not page:
+        return []
+
+    if len(page) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(page[-1].created_at, page[-1].id)
+
+    result = await db.execute(select(Photo).filter(Photo.id.in_([row.id for row in page])))
+    photos = {photo.id: photo for photo in result.scalars()}
+    return [photos[row.id] for row in page]
+
+# 认证、动物、检查重名 (改名时)、UPDATE、分组计数 (分组字段变化时)、读取结果
 @router.put("/{animal_id}", response_model=AnimalSchema)
+@query_budget(6)
 async def update_animal(
     animal_id: int,
     animal: AnimalCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(check_manager_permission)
 ):
     """更新动物 (需要管理员权限)"""
-    db_animal = db.query(Animal).filter(Animal.id == animal_id).first()
+    result = await db.execute(select(Animal).filter(Animal.id == animal_id))
+    db_animal = result.scalars().first()
     if db_animal is None:
         raise HTTPException(status_code=404, detail="动物不存在")
 
     # 检查更新后的动物名是否与现有其他动物冲突
     if animal.name != db_animal.name:
-        existing_animal = db.query(Animal).filter(Animal.name == animal.name).first()
+        result = await db.execute(select(Animal).filter(Animal.name == animal.name))
+        existing_animal = result.scalars().first()
         if existing_animal:
              raise HTTPException(status_code=400, detail="动物名已被使用")
 
     for key, value in animal.dict(exclude_unset=True).items():
         setattr(db_animal, key, value)
 
-    db.commit()
-    db.refresh(db_animal)
-    
-    # 获取最佳照片
-    best_photo = db.query(Photo).filter(
-        Photo.animal_id == animal_id, 
-        Photo.best == True
-    ).first()
-    
-    animal_data = AnimalSchema.from_orm(db_animal)
-    animal_data.best_photo = best_photo
-    
-    return animal_data
+    await db.commit()
+    response_cache.invalidate()
+    return await read_animal_row(db, animal_id)
+
+# 认证、锁定动物并检查照片、UPDATE 照片、UPDATE 动物、读取结果
+@router.put("/{animal_id}/best-photo", response_model=AnimalSchema)
+@query_budget(5)
+async def set_best_photo(
+    animal_id: int,
+    best_photo: BestPhotoUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(check_manager_permission)
+):
+    """设置动物的最佳照片 (需要管理员权限)
+
+    在同一事务中更新 Animal.best_photo_id 与 Photo.best，保证每只动物最多一张最佳照片。
+    """
+    # 锁定动物记录，避免并发设置产生多张最佳照片；同一条语句检查照片是否属于该动物
+    query = select(Animal).filter(Animal.id == animal_id)
+    if best_photo.photo_id is not None:
+        query = query.add_columns(Photo.id).outerjoin(
+            Photo, and_(Photo.id == best_photo.photo_id, Photo.animal_id == Animal.id)
+        )
+    result = await db.execute(query.with_for_update())
+    row = result.first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="动物不存在")
+    db_animal = row[0]
+    if best_photo.photo_id is not None and row[1] is None:
+        raise HTTPException(status_code=404, detail="照片不存在或不属于该动物")
+
+    # 一条语句清除原最佳照片并标记新的最佳照片 (photo_id 为空时只清除)
+    await db.execute(
+        update(Photo)
+        .filter(Photo.animal_id == animal_id, or_(Photo.best == True, Photo.id == best_photo.photo_id))
+        .values(best=Photo.id == best_photo.photo_id)
+        .execution_options(synchronize_session=False)
+    )
+    db_animal.best_photo_id = best_photo.photo_id
+
+    await db.commit()
+    response_cache.invalidate()
+    return await read_animal_row(db, animal_id)
 
+# 认证、动物、解除照片关联、DELETE、分组计数
 @router.delete("/{animal_id}", status_code=status.HTTP_204_NO_CONTENT)
+@query_budget(5)
 async def delete_animal(
     animal_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(check_manager_permission)
 ):
     """删除动物 (需要管理员权限)"""
-    db_animal = db.query(Animal).filter(Animal.id == animal_id).first()
+    result = await db.execute(select(Animal).filter(Animal.id == animal_id))
+    db_animal = result.scalars().first()
     if db_animal is None:
         raise HTTPException(status_code=404, detail="动物不存在")
 
-    db.delete(db_animal)
-    db.commit()
+    # 一条 UPDATE 解除照片关联，并将照片集合标记为已加载的空集合，删除时 ORM 不再逐张加载照片
+    await db.execute(
+        update(Photo).filter(Photo.animal_id == animal_id).values(animal_id=None)
+        .execution_options(synchronize_session=False)
+    )
+    set_committed_value(db_animal, "photos", [])
+    await db.delete(db_animal)
+    await db.commit()
+    response_cache.invalidate()
+    known_animals.discard(animal_id)
     return None
@@ -1,19 +1,23 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status, Response, Cookie, Request, Header
 from fastapi.security import OAuth2PasswordBearer, HTTPBearer, HTTPAuthorizationCredentials
-from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from jose import JWTError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 from fastapi.responses import JSONResponse
 from app.schemas.user import User as UserSchema, UserResponse
 
-from app.db.database import get_db
+from app.db.database import get_async_db
 from app.models.user import User
 from app.schemas.user import UserInDB, UserLogin
 from app.utils.auth import (
-    verify_password,
-    create_access_token
+    verify_password_async,
+    create_access_token,
+    decode_access_token
 )
+from app.utils.token_revocation import token_revocations
+from app.utils.user_cache import UserSnapshot, user_cache
 from app.config import config
 
 router = APIRouter()
@@ -24,15 +28,16 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/login", auto_error=False)
 bearer_scheme = HTTPBearer(auto_error=False)
 
 
-def get_user(db: Session, email: str):
+async def get_user(db: AsyncSession, email: str):
     """根据邮箱获取用户"""
-    return db.query(User).filter(User.email == email).first()
+    result = await db.execute(select(User).filter(User.email == email))
+    return result.scalars().first()
 
 
-def authenticate_user(db: Session, email: str, password: str):
+async def authenticate_user(db: AsyncSession, email: str, password: str):
     """验证用户"""
-    user = get_user(db, email)
-    if not user or not verify_password(password, user.hashed_password):
+    user = await get_user(db, email)
+    if not user or not await verify_password_async(password, user.hashed_password):
         return False
     return user
 
@@ -66,29 +71,35 @@ def get_token_from_request(
 
 async def get_current_user(
     token: Optional[str] = Depends(get_token_from_request),
-    db: Session = Depends(get_db)
-) -> Optional[User]:
-    """获取当前用户"""
+    db: AsyncSession = Depends(get_async_db)
+) -> Optional[UserSnapshot]:
+    """获取当前用户 (优先从用户缓存中读取)"""
     if token is None:
         return None
 
     try:
-        payload = jwt.decode(token, config.secret_key,
-                             algorithms=[config.algorithm])
+        payload = decode_access_token(token)
         email = payload.get("sub")
         if email is None:
             return None
     except JWTError:
         return None
 
-    user = get_user(db, email=email)
-    if user is None:
+    if token_revocations.is_revoked(payload):
         return None
 
-    return user
+    user = user_cache.get(email)
+    if user is not None:
+        return user
+
+    db_user = await get_user(db, email=email)
+    if db_user is None:
+        return None
+
+    return user_cache.put(db_user)
 
 
-async def get_required_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_required_user(current_user: UserSnapshot = Depends(get_current_user)) -> UserSnapshot:
     """获取当前用户 (如果未认证则抛出 401)"""
     if current_user is None:
         raise HTTPException(
@@ -103,10 +114,10 @@ async def get_required_user(current_user: User = Depends(get_current_user)) -> U
 async def login_for_access_token(
     response: Response,
     login_data: UserLogin,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """用户登录 - 使用邮箱和密码"""
-    user = authenticate_user(db, login_data.email, login_data.password)
+    user = await authenticate_user(db, login_data.email, login_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -142,12 +153,37 @@ async def login_for_access_token(
 
 
 @router.post("/logout")
-async def logout(response: Response):
-    """用户登出"""
+async def logout(
+    response: Response,
+    token: Optional[str] = Depends(get_token_from_request),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """用户登出 - 吊销当前令牌并删除 Cookie"""
+    if token is not None:
+        try:
+            payload = decode_access_token(token)
+        except JWTError:
+            payload = None
+        if payload is not None and not token_revocations.is_revoked(payload):
+            await token_revocations.revoke(db, payload)
+
     response.delete_cookie(key="session_token")
     return {"message": "成功登出"}
 
 
+@router.post("/logout-all")
+async def logout_all(
+    response: Response,
+    current_user: UserSnapshot = Depends(get_required_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """退出所有设备 - 吊销当前用户此前签发的全部令牌"""
+    await token_revocations.revoke_all(db, current_user.email)
+
+    response.delete_cookie(key="session_token")
+    return {"message": "已退出所有设备"}
+
+
 @router.get("/me")
 async def get_current_user_info(current_user: User = Depends(get_required_user)):
     """验证并获取当前登录用户信息"""
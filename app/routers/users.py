@@ -1,31 +1,53 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Tuple
 
-from app.db.database import get_db
+from app.db.database import get_async_db
+from app.db.replicas import get_read_db
 from app.models.user import User
-from app.schemas.user import UserCreate, User as UserSchema, UserResponse
-from app.utils.auth import get_password_hash
+from app.schemas.user import UserCreate, User as UserSchema, UserFields, UserResponse
+from app.utils.auth import get_password_hash_async
 from app.routers.auth import get_current_user, get_required_user
+from app.utils.pagination import MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from app.utils.serialization import dumps, parse_fields, rows_to_dicts, schema_columns
 
 router = APIRouter()
 
+# 用户列表与详情直接选取 UserResponse 的字段
+USER_COLUMNS = schema_columns(UserResponse, User)
+# 列表与详情直接返回序列化后的 JSON (不经过 response_model)，OpenAPI 中按 fields= 选取字段的结构说明
+USER_LIST_RESPONSES = {200: {"model": List[UserFields]}}
+USER_DETAIL_RESPONSES = {200: {"model": UserFields}, 404: {"description": "用户不存在"}}
+
+
+def select_user_fields(fields: Optional[str]) -> Tuple[Tuple[str, ...], Select]:
+    """解析 fields= 参数 (字段名不正确时返回 400)，返回字段名与只选取这些列的查询"""
+    try:
+        keys = parse_fields(fields, tuple(USER_COLUMNS), USER_COLUMNS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return keys, select(*(USER_COLUMNS[key] for key in keys))
+
 
 @router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def create_user(user: UserCreate, db: Session = Depends(get_db)):
+async def create_user(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """创建新用户"""
     # 检查是否存在同名用户
-    db_user = db.query(User).filter(User.username == user.username).first()
+    result = await db.execute(select(User).filter(User.username == user.username))
+    db_user = result.scalars().first()
     if db_user:
         raise HTTPException(status_code=400, detail="用户名已被使用")
 
     # 检查邮箱是否已被使用
-    db_email = db.query(User).filter(User.email == user.email).first()
+    result = await db.execute(select(User).filter(User.email == user.email))
+    db_email = result.scalars().first()
     if db_email:
         raise HTTPException(status_code=400, detail="邮箱已被使用")
 
     # 创建新用户
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
     db_user = User(
         username=user.username,
         email=user.email,
@@ -33,34 +55,63 @@ async def create_user(user: UserCreate, db: Session = Depends(get_db)):
     )
 
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
 
     return db_user
 
 
-@router.get("/", response_model=List[UserResponse])
+@router.get("/", response_class=ORJSONResponse, responses=USER_LIST_RESPONSES)
 async def read_users(
-    skip: int = 0,
-    limit: int = 10,
-    db: Session = Depends(get_db),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_required_user)
 ):
-    """获取用户列表"""
+    """获取用户列表
+
+    - cursor: 上一页响应头 X-Next-Cursor 中的游标，按 id 索引定位，提供时忽略 skip
+    - fields: 逗号分隔的返回字段，总是包含 id；默认返回全部字段
+    """
 
-    users = db.query(User).offset(skip).limit(limit).all()
-    return users
+    keys, query = select_user_fields(fields)
+    query = query.order_by(User.id)
+    if cursor is not None:
+        try:
+            (last_id,) = decode_cursor(cursor, int)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        query = query.filter(User.id > last_id)
+    else:
+        query = query.offset(skip)
 
+    result = await db.execute(query.limit(limit))
+    rows = result.all()
 
-@router.get("/{user_id}", response_model=UserResponse)
+    headers = {}
+    if rows and len(rows) == limit:
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1].id)
+    # 直接序列化列元组，不经过 response_model 校验
+    return Response(content=dumps(rows_to_dicts(rows, keys)), media_type="application/json", headers=headers)
+
+
+@router.get("/{user_id}", response_class=ORJSONResponse, responses=USER_DETAIL_RESPONSES)
 async def read_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_required_user)
 ):
-    """获取指定用户"""
+    """获取指定用户
 
-    db_user = db.query(User).filter(User.id == user_id).first()
-    if db_user is None:
+    - fields: 逗号分隔的返回字段，总是包含 id；默认返回全部字段
+    """
+
+    keys, query = select_user_fields(fields)
+    result = await db.execute(query.filter(User.id == user_id))
+    row = result.first()
+    if row is None:
         raise HTTPException(status_code=404, detail="用户不存在")
-    return db_user
+    return Response(content=dumps(dict(zip(keys, row))), media_type="application/json")
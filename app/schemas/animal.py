@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional, Union
 from datetime import datetime
 from .photo import Photo
 
@@ -16,11 +16,60 @@ class AnimalBase(BaseModel):
 class AnimalCreate(AnimalBase):
     pass
 
+class BestPhotoUpdate(BaseModel):
+    photo_id: Optional[int] = Field(None, description="最佳照片ID，为空时清除最佳照片")
+
+class AnimalImportError(BaseModel):
+    """批量导入中失败的行"""
+    line: int = Field(..., description="行号 (CSV 不含表头，从 1 开始)")
+    name: Optional[str] = Field(None, description="动物名")
+    error: str = Field(..., description="失败原因")
+
+class AnimalImportResult(BaseModel):
+    """批量导入结果"""
+    total: int = Field(0, description="读取的行数")
+    inserted: int = Field(0, description="成功导入的行数")
+    failed: int = Field(0, description="失败的行数")
+    errors: List[AnimalImportError] = Field(default_factory=list, description="失败行明细")
+
+class FacetCount(BaseModel):
+    """某个分组值的动物数量"""
+    value: Optional[Union[bool, str]] = Field(None, description="分组值，未填写为空")
+    count: int
+
+class AnimalFacets(BaseModel):
+    """按校区、区域、性别、是否活跃分组的动物数量"""
+    campus: List[FacetCount] = Field(default_factory=list)
+    area: List[FacetCount] = Field(default_factory=list)
+    gender: List[FacetCount] = Field(default_factory=list)
+    is_active: List[FacetCount] = Field(default_factory=list)
+
 class Animal(AnimalBase):
     id: int
     created_at: datetime
     updated_at: Optional[datetime] = None
+    best_photo_id: Optional[int] = None
     best_photo: Optional[Photo] = None
 
     class Config:
         from_attributes = True
+
+class AnimalFields(BaseModel):
+    """按 fields= 选取字段的动物 (列表、搜索、详情接口的响应)
+
+    id 总是返回，其余字段只在请求时出现；未指定 fields 时，列表与搜索不返回
+    characteristics 与 habit，详情返回全部字段。
+    """
+    id: int
+    name: Optional[str] = None
+    nickname: Optional[str] = None
+    gender: Optional[str] = None
+    characteristics: Optional[str] = None
+    campus: Optional[str] = None
+    area: Optional[str] = None
+    habit: Optional[str] = None
+    is_active: Optional[bool] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    best_photo_id: Optional[int] = None
+    best_photo: Optional[Photo] = None
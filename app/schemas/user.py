@@ -35,5 +35,15 @@ class UserResponse(UserBase):
         "from_attributes": True
     }
 
+class UserFields(BaseModel):
+    """按 fields= 选取字段的用户 (列表、详情接口的响应)，id 总是返回，其余字段只在请求时出现"""
+    id: int
+    username: Optional[str] = None
+    email: Optional[EmailStr] = None
+    openid: Optional[str] = None
+    avatarUrl: Optional[str] = None
+    manager: Optional[int] = None
+    created_at: Optional[datetime] = None
+
 class UserInDB(User):
     hashed_password: str
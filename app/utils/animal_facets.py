@@ -0,0 +1,149 @@
+import asyncio
+import logging
+from collections import Counter
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import delete, event, func, inspect, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.db.upsert import insert_or_increment
+from app.models.animal import Animal
+from app.models.animal_facet import AnimalFacet
+
+logger = logging.getLogger(__name__)
+
+FACETS = ("campus", "area", "gender", "is_active")
+
+FacetKey = Tuple[str, str]
+
+
+def encode_value(value) -> str:
+    """字段值转为 animal_facets.value"""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    return str(value)
+
+
+def decode_value(facet: str, value: str):
+    """animal_facets.value 转回接口返回的值"""
+    if value == "":
+        return None
+    if facet == "is_active":
+        return value == "1"
+    return value
+
+
+def facet_deltas(animals: Iterable[dict], sign: int = 1) -> Counter:
+    """一组动物对各分组计数的增量"""
+    deltas = Counter()
+    for animal in animals:
+        for facet in FACETS:
+            deltas[(facet, encode_value(animal.get(facet)))] += sign
+    return deltas
+
+
+def _increment_rows(deltas: Dict[FacetKey, int]) -> list:
+    return [
+        {"facet": facet, "value": value, "count": delta}
+        for (facet, value), delta in deltas.items() if delta
+    ]
+
+
+async def apply_deltas(db: AsyncSession, deltas: Dict[FacetKey, int]) -> None:
+    """在当前事务中累加分组计数 (Core 批量写入不会触发 ORM 事件，需要显式调用)"""
+    rows = _increment_rows(deltas)
+    if rows:
+        await db.execute(insert_or_increment(AnimalFacet.__table__, db.bind.dialect.name, "count"), rows)
+
+
+async def read_facets(db: AsyncSession) -> Dict[str, list]:
+    """读取各分组计数，按数量降序"""
+    result = await db.execute(
+        select(AnimalFacet.facet, AnimalFacet.value, AnimalFacet.count)
+        .filter(AnimalFacet.count > 0)
+        .order_by(AnimalFacet.facet, AnimalFacet.count.desc(), AnimalFacet.value)
+    )
+    facets = {facet: [] for facet in FACETS}
+    for row in result:
+        if row.facet in facets:
+            facets[row.facet].append({"value": decode_value(row.facet, row.value), "count": row.count})
+    return facets
+
+
+async def reconcile(engine: AsyncEngine) -> int:
+    """按 animals 表重新统计并修正分组计数，返回修正的行数
+
+    先锁住 animal_facets 的全部行，阻塞期间的增量写入，再统计 animals 表，避免覆盖并发写入。
+    """
+    async with AsyncSession(engine) as db:
+        async with db.begin():
+            result = await db.execute(select(AnimalFacet.facet, AnimalFacet.value, AnimalFacet.count).with_for_update())
+            current = {(row.facet, row.value): row.count for row in result}
+
+            expected = Counter()
+            for facet in FACETS:
+                column = getattr(Animal, facet)
+                result = await db.execute(select(column, func.count()).group_by(column))
+                for value, count in result:
+                    expected[(facet, encode_value(value))] += count
+
+            deltas = {
+                key: expected.get(key, 0) - current.get(key, 0)
+                for key in current.keys() | expected.keys()
+                if expected.get(key, 0) != current.get(key, 0)
+            }
+            if not deltas:
+                return 0
+
+            logger.warning(f"动物分组计数与 animals 表不一致，修正 {len(deltas)} 项: {deltas}")
+            await apply_deltas(db, deltas)
+            await db.execute(delete(AnimalFacet).filter(AnimalFacet.count <= 0))
+            return len(deltas)
+
+
+async def run_reconciler(engine: AsyncEngine, interval: float, on_change: Optional[Callable[[], None]] = None) -> None:
+    """启动时核对一次，之后每隔 interval 秒核对一次 (interval 为 0 时只核对一次)"""
+    while True:
+        try:
+            if await reconcile(engine) and on_change is not None:
+                on_change()
+        except Exception as e:
+            logger.error(f"动物分组计数核对失败: {e}")
+        if not interval:
+            return
+        await asyncio.sleep(interval)
+
+
+# ORM 写入动物时，在同一事务中更新分组计数
+def _apply_in_flush(connection, deltas: Counter) -> None:
+    rows = _increment_rows(deltas)
+    if rows:
+        connection.execute(insert_or_increment(AnimalFacet.__table__, connection.dialect.name, "count"), rows)
+
+
+@event.listens_for(Animal, "after_insert")
+def _count_insert(mapper, connection, target):
+    _apply_in_flush(connection, facet_deltas([{facet: getattr(target, facet) for facet in FACETS}]))
+
+
+@event.listens_for(Animal, "after_delete")
+def _count_delete(mapper, connection, target):
+    _apply_in_flush(connection, facet_deltas([{facet: getattr(target, facet) for facet in FACETS}], sign=-1))
+
+
+@event.listens_for(Animal, "after_update")
+def _count_update(mapper, connection, target):
+    state = inspect(target)
+    deltas = Counter()
+    for facet in FACETS:
+        history = state.attrs[facet].history
+        # 修改前未加载的字段不知道旧值，留给定期核对修正
+        if not history.has_changes() or not history.deleted:
+            continue
+        old, new = encode_value(history.deleted[0]), encode_value(getattr(target, facet))
+        if old != new:
+            deltas[(facet, old)] -= 1
+            deltas[(facet, new)] += 1
+    _apply_in_flush(connection, deltas)
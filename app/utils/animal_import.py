@@ -0,0 +1,143 @@
+import asyncio
+import csv
+import json
+from itertools import islice
+from typing import Iterator, List, Optional, TextIO, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.animal import Animal
+from app.schemas.animal import AnimalCreate, AnimalImportError, AnimalImportResult
+from app.utils.animal_facets import apply_deltas, facet_deltas
+
+# 支持的导入格式及对应的文件扩展名
+IMPORT_FORMATS = {
+    ".csv": "csv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+}
+
+# (行号, 行数据, 解析错误)
+Row = Tuple[int, Optional[dict], Optional[str]]
+
+
+def detect_format(filename: Optional[str]) -> Optional[str]:
+    """根据文件扩展名推断导入格式"""
+    if not filename:
+        return None
+    for extension, fmt in IMPORT_FORMATS.items():
+        if filename.lower().endswith(extension):
+            return fmt
+    return None
+
+
+def read_rows(file: TextIO, fmt: str) -> Iterator[Row]:
+    """逐行读取 CSV (带表头) 或 JSON Lines 文件"""
+    if fmt == "csv":
+        for line, record in enumerate(csv.DictReader(file), start=1):
+            # 空单元格视为未提供，使用模型默认值
+            yield line, {k: v for k, v in record.items() if k and v not in ("", None)}, None
+    elif fmt == "jsonl":
+        for line, text in enumerate(file, start=1):
+            if not text.strip():
+                continue
+            try:
+                record = json.loads(text)
+            except json.JSONDecodeError as e:
+                yield line, None, f"JSON 格式错误: {e.msg}"
+                continue
+            if not isinstance(record, dict):
+                yield line, None, "每行必须是一个 JSON 对象"
+                continue
+            yield line, record, None
+    else:
+        raise ValueError(f"不支持的导入格式: {fmt}")
+
+
+def _format_validation_error(e: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}" for error in e.errors()
+    )
+
+
+async def _insert_batch(db: AsyncSession, batch: List[Tuple[int, AnimalCreate]], result: AnimalImportResult):
+    """写入一批已通过校验的行，批量写入失败时逐行重试以定位失败行"""
+    try:
+        rows = [animal.model_dump() for _, animal in batch]
+        await db.execute(insert(Animal), rows)
+        await apply_deltas(db, facet_deltas(rows))
+        await db.commit()
+        result.inserted += len(batch)
+        return
+    except IntegrityError:
+        await db.rollback()
+
+    # 批次内有行与并发写入冲突，逐行写入
+    for line, animal in batch:
+        try:
+            row = animal.model_dump()
+            await db.execute(insert(Animal), [row])
+            await apply_deltas(db, facet_deltas([row]))
+            await db.commit()
+            result.inserted += 1
+        except IntegrityError as e:
+            await db.rollback()
+            result.errors.append(AnimalImportError(line=line, name=animal.name, error=f"写入失败: {e.orig}"))
+
+
+async def _import_batch(db: AsyncSession, rows: List[Row], result: AnimalImportResult):
+    """校验并写入一批行"""
+    valid: List[Tuple[int, AnimalCreate]] = []
+    seen_names = set()
+    for line, record, error in rows:
+        name = record.get("name") if record else None
+        if error is not None:
+            result.errors.append(AnimalImportError(line=line, name=name, error=error))
+            continue
+        try:
+            animal = AnimalCreate.model_validate(record)
+        except ValidationError as e:
+            result.errors.append(AnimalImportError(line=line, name=name, error=_format_validation_error(e)))
+            continue
+        if animal.name in seen_names:
+            result.errors.append(AnimalImportError(line=line, name=animal.name, error="文件中动物名重复"))
+            continue
+        seen_names.add(animal.name)
+        valid.append((line, animal))
+
+    if not valid:
+        return
+
+    # 每批只做一次重名检查
+    existing = await db.execute(select(Animal.name).filter(Animal.name.in_(seen_names)))
+    existing_names = set(existing.scalars())
+    batch = []
+    for line, animal in valid:
+        if animal.name in existing_names:
+            result.errors.append(AnimalImportError(line=line, name=animal.name, error="动物名已被使用"))
+        else:
+            batch.append((line, animal))
+
+    if batch:
+        await _insert_batch(db, batch, result)
+
+
+async def import_animals(db: AsyncSession, rows: Iterator[Row], batch_size: int) -> AnimalImportResult:
+    """分批流式导入动物，返回逐行错误报告
+
+    每批独立提交，某一行失败不影响其他行。读取文件在线程池中进行，不阻塞事件循环。
+    """
+    result = AnimalImportResult()
+    while True:
+        batch = await asyncio.to_thread(lambda: list(islice(rows, batch_size)))
+        if not batch:
+            break
+        result.total += len(batch)
+        await _import_batch(db, batch, result)
+
+    result.errors.sort(key=lambda error: error.line)
+    result.failed = len(result.errors)
+    return result
@@ -0,0 +1,373 @@
+import asyncio
+import logging
+import re
+from collections import Counter
+from itertools import chain
+import unicodedata
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import Row, Select, event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session, object_session
+
+from app.db.database import async_engine
+from app.models.animal import Animal
+from app.utils.metrics import current_request
+
+logger = logging.getLogger(__name__)
+
+FULLTEXT_INDEX = "ft_animals_search"
+SEARCH_COLUMNS = ("name", "nickname", "characteristics", "campus", "area")
+# 名字与昵称命中的排在其他字段命中之前
+TITLE_COLUMNS = ("name", "nickname")
+# 每段文本末尾追加的哨兵，使每个字符都是某个二元组的首字符，单字查询可按首字符查找
+RUN_END = "\0"
+
+_TERM_RE = re.compile(r"\w+")
+
+
+def normalize(text: Optional[str]) -> str:
+    """全角转半角并转为小写"""
+    if not text:
+        return ""
+    return unicodedata.normalize("NFKC", text).lower()
+
+
+def split_terms(query: str) -> List[str]:
+    """按空白与标点切分查询词，去重并保持顺序"""
+    return list(dict.fromkeys(_TERM_RE.findall(normalize(query))))
+
+
+def bigrams(text: str) -> Set[str]:
+    """文本的二元组，与 MySQL ngram 分词 (ngram_token_size=2) 一致"""
+    tokens = set()
+    for run in _TERM_RE.findall(text):
+        run += RUN_END
+        tokens.update(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+class _Postings:
+    """二元组 -> 动物ID集合，并按首字符记录二元组以支持单字查询"""
+
+    def __init__(self):
+        self._ids: Dict[str, Set[int]] = {}
+        self._prefixes: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def add(self, animal_id: int, tokens: Set[str]) -> None:
+        for token in tokens:
+            ids = self._ids.get(token)
+            if ids is None:
+                ids = self._ids[token] = set()
+                self._prefixes.setdefault(token[0], set()).add(token)
+            ids.add(animal_id)
+
+    def remove(self, animal_id: int, tokens: Set[str]) -> None:
+        for token in tokens:
+            ids = self._ids[token]
+            ids.discard(animal_id)
+            if not ids:
+                del self._ids[token]
+                prefixes = self._prefixes[token[0]]
+                prefixes.discard(token)
+                if not prefixes:
+                    del self._prefixes[token[0]]
+
+    def clear(self) -> None:
+        self._ids.clear()
+        self._prefixes.clear()
+
+    def lookup(self, term: str) -> Set[int]:
+        """可能包含查询词的动物ID；两字以上的词需再用子串匹配确认"""
+        if len(term) == 1:
+            ids = set()
+            for token in self._prefixes.get(term, ()):
+                ids |= self._ids[token]
+            return ids
+
+        # 查询词可能出现在文本中间，不使用末尾哨兵
+        postings = []
+        for token in {term[i:i + 2] for i in range(len(term) - 1)}:
+            ids = self._ids.get(token)
+            if ids is None:
+                return set()
+            postings.append(ids)
+        postings.sort(key=len)
+        return postings[0].intersection(*postings[1:])
+
+
+class InvertedIndex:
+    """进程内的二元组倒排索引，供不支持 FULLTEXT 的数据库 (SQLite) 使用
+
+    - 多字查询词取其全部二元组倒排表的交集，单字查询词取以该字开头的二元组倒排表的并集
+    - 名字/昵称另建一份倒排表，命中的得分高于其他字段，名字完全相同的排在最前
+    - 得分相同按 ID 排序；排序只用集合运算，三字以上的词在取出结果时才做子串确认
+    """
+
+    def __init__(self):
+        self._all = _Postings()
+        self._title = _Postings()
+        self._docs: Dict[int, Tuple[str, str, str]] = {}
+        self._names: Dict[str, int] = {}
+        self.max_id = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, animal_id: int, values: dict) -> None:
+        """加入或替换一只动物的索引"""
+        self.remove(animal_id)
+        name = normalize(values.get("name"))
+        title = " ".join(normalize(values.get(column)) for column in TITLE_COLUMNS)
+        body = " ".join(normalize(values.get(column)) for column in SEARCH_COLUMNS if column not in TITLE_COLUMNS)
+        self._docs[animal_id] = (name, title, body)
+        self._names[name] = animal_id
+        title_tokens = bigrams(title)
+        self._title.add(animal_id, title_tokens)
+        self._all.add(animal_id, title_tokens | bigrams(body))
+        self.max_id = max(self.max_id, animal_id)
+
+    def remove(self, animal_id: int) -> None:
+        doc = self._docs.pop(animal_id, None)
+        if doc is None:
+            return
+        name, title, body = doc
+        if self._names.get(name) == animal_id:
+            del self._names[name]
+        title_tokens = bigrams(title)
+        self._title.remove(animal_id, title_tokens)
+        self._all.remove(animal_id, title_tokens | bigrams(body))
+
+    def clear(self) -> None:
+        self._all.clear()
+        self._title.clear()
+        self._docs.clear()
+        self._names.clear()
+        self.max_id = 0
+
+    def _contains(self, animal_id: int, terms: List[str]) -> bool:
+        """子串确认：二元组都命中不代表它们相邻"""
+        _, title, body = self._docs[animal_id]
+        return all(term in title or term in body for term in terms if len(term) > 2)
+
+    def search(self, terms: List[str], limit: int) -> List[int]:
+        """返回同时包含全部查询词的动物ID，按得分降序"""
+        candidates = None
+        for term in sorted(terms, key=len, reverse=True):
+            ids = self._all.lookup(term)
+            candidates = ids if candidates is None else candidates & ids
+            if not candidates:
+                return []
+
+        # 名字/昵称命中的词数越多越靠前，其余候选只在其他字段命中
+        title_sets = [self._title.lookup(term) & candidates for term in terms]
+        if len(title_sets) == 1:
+            groups = [title_sets[0]]
+        else:
+            levels: Dict[int, List[int]] = {}
+            for animal_id, hits in Counter(chain.from_iterable(title_sets)).items():
+                levels.setdefault(hits, []).append(animal_id)
+            groups = [levels[hits] for hits in sorted(levels, reverse=True)]
+        groups.append(candidates.difference(*title_sets))
+
+        exact = self._names.get(" ".join(terms))
+        result = [exact] if exact in candidates and self._contains(exact, terms) else []
+        for group in groups:
+            if len(result) >= limit:
+                break
+            for animal_id in sorted(group):
+                if animal_id != exact and self._contains(animal_id, terms):
+                    result.append(animal_id)
+                    if len(result) == limit:
+                        break
+        return result
+
+    def stats(self) -> dict:
+        return {"documents": len(self._docs), "tokens": len(self._all)}
+
+
+class AnimalSearch:
+    """动物全文搜索
+
+    MySQL 上存在 ngram FULLTEXT 索引 (迁移 m0003) 时直接使用 MATCH ... AGAINST；
+    否则在进程内维护二元组倒排索引：启动时从数据库构建，本进程的写入提交后更新，
+    每次搜索前补充其他进程新插入的动物。其他进程对已有动物的修改和删除由定期重建
+    (SEARCH_INDEX_REBUILD_SECONDS) 同步，在此之前可能按旧内容匹配；
+    搜索结果总是从数据库读取最新数据，已删除的动物不会出现在结果中。
+    """
+
+    def __init__(self):
+        self.index = InvertedIndex()
+        self.fulltext = False
+        self.started = False
+        self.rebuilds = 0
+        self._start_lock = asyncio.Lock()
+        # 重建期间本进程提交的写入，重建完成后应用到新索引
+        self._pending: Optional[List[Dict[int, Optional[dict]]]] = None
+
+    async def warm_up(self, engine: AsyncEngine) -> None:
+        """在后台构建索引；失败时由第一次搜索重试"""
+        try:
+            await self.ensure_started(engine)
+        except Exception as e:
+            logger.error(f"动物搜索索引构建失败: {e}")
+
+    async def ensure_started(self, engine: AsyncEngine) -> None:
+        """索引尚未构建时构建，构建期间的搜索等待构建完成"""
+        if self.started:
+            return
+        async with self._start_lock:
+            if not self.started:
+                # 构建索引是一次性的工作，不计入触发它的请求的查询预算
+                token = current_request.set(None)
+                try:
+                    await self.start(engine)
+                finally:
+                    current_request.reset(token)
+
+    async def start(self, engine: AsyncEngine) -> None:
+        """选择搜索方式，必要时构建进程内索引"""
+        if engine.dialect.name == "mysql":
+            async with engine.connect() as conn:
+                indexes = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_indexes("animals"))
+            self.fulltext = any(index["name"] == FULLTEXT_INDEX for index in indexes)
+            if not self.fulltext:
+                logger.warning(f"animals 表缺少 FULLTEXT 索引 {FULLTEXT_INDEX}，使用进程内索引搜索")
+
+        self.index.clear()
+        if not self.fulltext:
+            async with AsyncSession(engine) as db:
+                await self.catch_up(db)
+            logger.info(f"动物搜索索引构建完成: {self.index.stats()}")
+        self.started = True
+
+    async def catch_up(self, db: AsyncSession, index: Optional[InvertedIndex] = None) -> None:
+        """索引 ID 大于已索引最大 ID 的动物 (其他进程或批量导入新插入的动物)"""
+        index = self.index if index is None else index
+        columns = [getattr(Animal, column) for column in SEARCH_COLUMNS]
+        result = await db.stream(
+            select(Animal.id, *columns).filter(Animal.id > index.max_id).order_by(Animal.id)
+        )
+        async for rows in result.partitions(1000):
+            for row in rows:
+                index.add(row.id, row._mapping)
+
+    async def rebuild(self, engine: AsyncEngine) -> None:
+        """从数据库构建新的进程内索引后替换，使其他进程对已有动物的修改和删除生效
+
+        构建期间搜索仍使用原索引；构建期间本进程提交的写入在替换前按顺序应用到新索引，
+        避免被构建时读到的旧数据覆盖。
+        """
+        if not self.started or self.fulltext or self._pending is not None:
+            return
+        index = InvertedIndex()
+        self._pending = []
+        try:
+            async with AsyncSession(engine) as db:
+                await self.catch_up(db, index)
+            for dirty in self._pending:
+                self._apply(index, dirty)
+        finally:
+            self._pending = None
+        self.index = index
+        self.rebuilds += 1
+
+    def apply(self, dirty: Dict[int, Optional[dict]]) -> None:
+        """应用本进程提交的写入 (动物ID -> 搜索列的值，删除时为 None)"""
+        self._apply(self.index, dirty)
+        if self._pending is not None:
+            self._pending.append(dirty)
+
+    @staticmethod
+    def _apply(index: InvertedIndex, dirty: Dict[int, Optional[dict]]) -> None:
+        for animal_id, values in dirty.items():
+            if values is None:
+                index.remove(animal_id)
+            else:
+                index.add(animal_id, values)
+
+    async def search(self, db: AsyncSession, query: str, limit: int, columns: Select) -> List[Row]:
+        """按相关度返回匹配动物的行
+
+        columns 为选取 Animal 各列的查询 (必须包含 Animal.id)，由调用方决定返回哪些字段。
+        """
+        terms = split_terms(query)
+        if not terms:
+            return []
+        # 只读会话在执行第一条语句时才选择引擎，索引从主库构建
+        await self.ensure_started(async_engine)
+
+        if self.fulltext:
+            # 只有 MySQL 用到，按需导入
+            from sqlalchemy.dialects.mysql import match
+
+            search_columns = [getattr(Animal, column) for column in SEARCH_COLUMNS]
+            # 每个词都必须出现；单字词按前缀匹配 ngram 词元
+            required = " ".join(f'+"{term}"' if len(term) > 1 else f"+{term}*" for term in terms)
+            relevance = match(*search_columns, against=" ".join(terms))
+            result = await db.execute(
+                columns
+                .filter(match(*search_columns, against=required).in_boolean_mode())
+                .order_by(relevance.desc(), Animal.id)
+                .limit(limit)
+            )
+            return result.all()
+
+        await self.catch_up(db)
+        ids = self.index.search(terms, limit)
+        if not ids:
+            return []
+        result = await db.execute(columns.filter(Animal.id.in_(ids)))
+        rows = {row.id: row for row in result}
+        return [rows[animal_id] for animal_id in ids if animal_id in rows]
+
+    def stats(self) -> dict:
+        return {"fulltext": int(self.fulltext), "rebuilds": self.rebuilds, **self.index.stats()}
+
+
+animal_search = AnimalSearch()
+
+
+async def run_rebuilder(engine: AsyncEngine, interval: float) -> None:
+    """每隔 interval 秒重建一次进程内索引 (interval 为 0 时不重建，适用于单进程部署)"""
+    if not interval:
+        return
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await animal_search.rebuild(engine)
+        except Exception as e:
+            logger.error(f"重建动物搜索索引失败: {e}")
+
+
+# 本进程通过 ORM 写入的动物在提交后更新进程内索引
+@event.listens_for(Animal, "after_insert")
+@event.listens_for(Animal, "after_update")
+def _index_on_write(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        values = {column: getattr(target, column) for column in SEARCH_COLUMNS}
+        session.info.setdefault("animal_search_dirty", {})[target.id] = values
+
+
+@event.listens_for(Animal, "after_delete")
+def _remove_on_delete(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("animal_search_dirty", {})[target.id] = None
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_after_commit(session):
+    dirty = session.info.pop("animal_search_dirty", None)
+    if not dirty or animal_search.fulltext:
+        return
+    animal_search.apply(dirty)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop("animal_search_dirty", None)
@@ -1,19 +1,108 @@
+import asyncio
+import hashlib
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from app.config import config
+from app.config import config, on_config_reload
+from app.utils.cache import TTLCache
 
-# 密码哈希上下文
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    """密码哈希上下文，第一次计算哈希时才导入 passlib，缩短启动时间"""
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+class PasswordHashPoolFull(Exception):
+    """密码哈希线程池已饱和"""
+
+
+class PasswordHashPool:
+    """bcrypt 专用的有界线程池
+
+    bcrypt 每次计算需要 100~300ms CPU，放在事件循环线程中执行会阻塞所有请求。
+    bcrypt 在计算期间会释放 GIL，因此使用线程池即可并行执行。
+    排队数超过 queue_limit 时立即抛出 PasswordHashPoolFull，而不是无限堆积。
+    """
+
+    def __init__(self, workers: int, queue_limit: int):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        # 已提交但尚未完成的任务数 (执行中 + 排队中)，只在事件循环线程中修改
+        self._in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @property
+    def queue_length(self) -> int:
+        """当前排队等待工作线程的任务数"""
+        return max(0, self._in_flight - self.workers)
+
+    async def run(self, func, *args):
+        """在线程池中执行 func(*args)"""
+        if self.queue_length >= self.queue_limit:
+            self.rejected += 1
+            raise PasswordHashPoolFull()
+
+        submitted = time.perf_counter()
+
+        def task():
+            waited = time.perf_counter() - submitted
+            return waited, func(*args)
+
+        self._in_flight += 1
+        try:
+            waited, result = await asyncio.get_running_loop().run_in_executor(self._executor, task)
+        finally:
+            self._in_flight -= 1
+
+        self.completed += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        return result
+
+    def stats(self) -> dict:
+        """线程池运行统计"""
+        return {
+            "workers": self.workers,
+            "queue_length": self.queue_length,
+            "queue_limit": self.queue_limit,
+            "in_flight": self._in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": self.total_wait / self.completed * 1000 if self.completed else 0.0,
+            "max_wait_ms": self.max_wait * 1000,
+        }
+
+
+password_hash_pool = PasswordHashPool(
+    workers=config.password_hash_workers,
+    queue_limit=config.password_hash_queue_limit,
+)
 
 def verify_password(plain_password, hashed_password):
     """验证密码是否匹配哈希值"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password):
     """获取密码的哈希值"""
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
+
+async def verify_password_async(plain_password, hashed_password):
+    """在哈希线程池中验证密码"""
+    return await password_hash_pool.run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password):
+    """在哈希线程池中计算密码哈希"""
+    return await password_hash_pool.run(get_password_hash, password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """创建访问令牌"""
@@ -24,7 +113,32 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=config.access_token_expire_minutes)
     
-    to_encode.update({"exp": expire})
+    # jti 用于吊销单个令牌，iat 用于吊销某一时间之前签发的全部令牌 (保留小数，同一秒内重新登录的令牌不受影响)
+    to_encode.update({"exp": expire, "iat": time.time(), "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, config.secret_key, algorithm=config.algorithm)
     
     return encoded_jwt
+
+
+# 已验证令牌缓存：令牌摘要 -> 解码后的声明，条目在令牌 exp 时过期
+token_cache = TTLCache(maxsize=config.token_cache_size, ttl=0)
+# 密钥或算法可能在重新加载后改变，已验证的结果不再可信
+on_config_reload(token_cache.clear)
+
+def decode_access_token(token: str) -> dict:
+    """解码并验证访问令牌，验证失败时抛出 JWTError
+
+    同一令牌在有效期内会被反复提交，验证通过的结果按令牌摘要缓存，
+    后续请求跳过签名校验；无效令牌不缓存，每次都会重新验证。
+    """
+    digest = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(digest)
+    if payload is not None:
+        return payload
+
+    payload = jwt.decode(token, config.secret_key, algorithms=[config.algorithm])
+
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        token_cache.set(digest, payload, ttl=exp - time.time())
+    return payload
@@ -0,0 +1,50 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.animal import Animal
+from app.utils.cache import TTLCache
+
+
+class KnownAnimals:
+    """已存在的动物ID缓存
+
+    动物很少被删除，已确认存在的ID长期保留，删除动物时调用 discard()；
+    不存在的ID短暂缓存，避免无效请求反复查询数据库。
+    缓存只在当前进程内有效。
+    """
+
+    def __init__(self, missing_ttl: float = 5, missing_maxsize: int = 1024):
+        self._ids = set()
+        self._missing = TTLCache(maxsize=missing_maxsize, ttl=missing_ttl)
+        self.hits = 0
+        self.misses = 0
+
+    async def exists(self, db: AsyncSession, animal_id: int) -> bool:
+        """判断动物是否存在，未缓存时查询数据库"""
+        if animal_id in self._ids:
+            self.hits += 1
+            return True
+        if self._missing.get(animal_id) is not None:
+            self.hits += 1
+            return False
+
+        self.misses += 1
+        result = await db.execute(select(Animal.id).filter(Animal.id == animal_id))
+        if result.first() is None:
+            self._missing.set(animal_id, True)
+            return False
+        self._ids.add(animal_id)
+        return True
+
+    def add(self, animal_id: int) -> None:
+        self._ids.add(animal_id)
+        self._missing.pop(animal_id)
+
+    def discard(self, animal_id: int) -> None:
+        self._ids.discard(animal_id)
+
+    def stats(self) -> dict:
+        return {"size": len(self._ids), "hits": self.hits, "misses": self.misses}
+
+
+known_animals = KnownAnimals()
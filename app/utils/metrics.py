@@ -0,0 +1,257 @@
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# 延迟直方图的分桶上限（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+# 未匹配到路由的请求统一归为一个标签，避免任意路径产生大量时间序列
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class Histogram:
+    """Prometheus 风格的累计分桶直方图"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: str) -> list:
+        prefix = f"{labels}," if labels else ""
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, self.counts):
+            cumulative += bucket_count
+            lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {self.count}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {self.sum}")
+        lines.append(f"{name}_count{suffix} {self.count}")
+        return lines
+
+
+@dataclass
+class RequestStats:
+    """单个请求内的数据库访问统计"""
+    scope: dict
+    queries: int = 0
+    db_time: float = 0.0
+    start: float = field(default_factory=time.perf_counter)
+
+    @property
+    def route(self) -> str:
+        """请求匹配到的路由模板，路由解析前为 UNMATCHED_ROUTE"""
+        return metrics.route_of(self.scope)
+
+
+# 当前请求的统计，由中间件设置，数据库事件在同一上下文中累加
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+def _label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return ",".join(f'{key}="{_label_value(value)}"' for key, value in labels.items())
+
+
+class Metrics:
+    """进程内指标
+
+    - 按 (方法, 路由模板) 统计请求延迟直方图，按 (方法, 路由模板, 状态码) 计数
+    - 通过 SQLAlchemy 事件统计查询次数、数据库耗时和连接池等待时间
+    - 各组件的 stats() 在抓取时读取，以 gauge 形式输出
+
+    只在事件循环线程中更新，不做加锁；指标仅反映当前进程。
+    """
+
+    def __init__(self):
+        self.request_latency: Dict[Tuple[str, str], Histogram] = {}
+        self.request_db_time: Dict[Tuple[str, str], Histogram] = {}
+        self.request_queries: Dict[Tuple[str, str], int] = {}
+        self.responses: Dict[Tuple[str, str, int], int] = {}
+        self.query_latency: Dict[str, Histogram] = {}
+        self.pool_wait: Dict[str, Histogram] = {}
+        self._components: Dict[str, Callable[[], dict]] = {}
+        self._routes: Dict[Callable, str] = {}
+
+    def route_of(self, scope: dict) -> str:
+        """根据路由解析时写入 scope 的 endpoint 找到路由模板"""
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        route = self._routes.get(endpoint)
+        if route is None:
+            for candidate in scope["app"].routes:
+                if getattr(candidate, "endpoint", None) is endpoint:
+                    route = candidate.path
+                    break
+            else:
+                route = UNMATCHED_ROUTE
+            self._routes[endpoint] = route
+        return route
+
+    def observe_request(self, method: str, route: str, status: int, stats: RequestStats) -> None:
+        key = (method, route)
+        histogram = self.request_latency.get(key)
+        if histogram is None:
+            histogram = self.request_latency[key] = Histogram(LATENCY_BUCKETS)
+            self.request_db_time[key] = Histogram(DB_BUCKETS)
+            self.request_queries[key] = 0
+        histogram.observe(time.perf_counter() - stats.start)
+        self.request_db_time[key].observe(stats.db_time)
+        self.request_queries[key] += stats.queries
+        status_key = (method, route, status)
+        self.responses[status_key] = self.responses.get(status_key, 0) + 1
+
+    def observe_query(self, engine_name: str, elapsed: float) -> None:
+        histogram = self.query_latency.get(engine_name)
+        if histogram is None:
+            histogram = self.query_latency[engine_name] = Histogram(DB_BUCKETS)
+        histogram.observe(elapsed)
+        stats = current_request.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += elapsed
+
+    def observe_pool_wait(self, engine_name: str, elapsed: float) -> None:
+        histogram = self.pool_wait.get(engine_name)
+        if histogram is None:
+            histogram = self.pool_wait[engine_name] = Histogram(DB_BUCKETS)
+        histogram.observe(elapsed)
+
+    def register_component(self, name: str, stats: Callable[[], dict]) -> None:
+        """注册组件统计，抓取时调用 stats() 并输出其中的数值项"""
+        self._components[name] = stats
+
+    def instrument_engine(self, engine: Engine, engine_name: str) -> None:
+        """为同步引擎 (异步引擎传入 async_engine.sync_engine) 注册查询与连接池计时"""
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            context.metrics_start = time.perf_counter()
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            self.observe_query(engine_name, time.perf_counter() - context.metrics_start)
+
+        # 连接池没有"开始等待"事件，包装 pool.connect() 计时；dispose() 会重建连接池，需重新包装
+        @event.listens_for(engine, "engine_disposed")
+        def engine_disposed(engine):
+            self._instrument_pool(engine, engine_name)
+
+        self._instrument_pool(engine, engine_name)
+
+    def _instrument_pool(self, engine: Engine, engine_name: str) -> None:
+        pool = engine.pool
+        connect = pool.connect
+
+        def timed_connect():
+            start = time.perf_counter()
+            try:
+                return connect()
+            finally:
+                self.observe_pool_wait(engine_name, time.perf_counter() - start)
+
+        pool.connect = timed_connect
+
+    def render(self) -> str:
+        """以 Prometheus 文本格式输出全部指标"""
+        lines = [
+            "# HELP anilog_http_request_duration_seconds HTTP request latency by route",
+            "# TYPE anilog_http_request_duration_seconds histogram",
+        ]
+        for (method, route), histogram in self.request_latency.items():
+            lines += histogram.render("anilog_http_request_duration_seconds", _labels(method=method, route=route))
+
+        lines += [
+            "# HELP anilog_http_request_db_seconds Database time spent per request by route",
+            "# TYPE anilog_http_request_db_seconds histogram",
+        ]
+        for (method, route), histogram in self.request_db_time.items():
+            lines += histogram.render("anilog_http_request_db_seconds", _labels(method=method, route=route))
+
+        lines += [
+            "# HELP anilog_http_request_queries_total Database statements executed by route",
+            "# TYPE anilog_http_request_queries_total counter",
+        ]
+        for (method, route), queries in self.request_queries.items():
+            lines.append(f"anilog_http_request_queries_total{{{_labels(method=method, route=route)}}} {queries}")
+
+        lines += [
+            "# HELP anilog_http_responses_total HTTP responses by route and status",
+            "# TYPE anilog_http_responses_total counter",
+        ]
+        for (method, route, status), total in self.responses.items():
+            lines.append(f"anilog_http_responses_total{{{_labels(method=method, route=route, status=status)}}} {total}")
+
+        lines += [
+            "# HELP anilog_db_query_duration_seconds Database statement latency",
+            "# TYPE anilog_db_query_duration_seconds histogram",
+        ]
+        for engine_name, histogram in self.query_latency.items():
+            lines += histogram.render("anilog_db_query_duration_seconds", _labels(engine=engine_name))
+
+        lines += [
+            "# HELP anilog_db_pool_checkout_seconds Time spent waiting for a pooled connection",
+            "# TYPE anilog_db_pool_checkout_seconds histogram",
+        ]
+        for engine_name, histogram in self.pool_wait.items():
+            lines += histogram.render("anilog_db_pool_checkout_seconds", _labels(engine=engine_name))
+
+        for component, stats in self._components.items():
+            for stat, value in stats().items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = f"anilog_{component}_{stat}"
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """记录每个请求的路由、状态码、延迟和数据库访问统计
+
+    使用纯 ASGI 中间件而不是 BaseHTTPMiddleware，避免额外的任务和响应体拷贝。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = current_request.set(stats)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request.reset(token)
+            metrics.observe_request(scope["method"], stats.route, status, stats)
+
+
+metrics = Metrics()
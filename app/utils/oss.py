@@ -0,0 +1,145 @@
+import base64
+import hashlib
+import hmac
+import json
+from datetime import datetime, timedelta, timezone
+
+from app.config import config, on_config_reload
+from app.schemas.photo import OSSCredentials, PermissionCredentials
+from app.utils.cache import TTLCache
+
+# 上传策略有效时间（5分钟），其中前 4 分钟内重复请求复用同一份策略
+UPLOAD_POLICY_SECONDS = 300
+UPLOAD_POLICY_REUSE_SECONDS = 240
+# 权限策略有效时间（30分钟），其中前 25 分钟内重复请求复用同一份策略
+PERMISSION_POLICY_SECONDS = 1800
+PERMISSION_POLICY_REUSE_SECONDS = 1500
+
+
+def _b64_json(data: dict) -> str:
+    return base64.b64encode(json.dumps(data).encode()).decode()
+
+
+class PolicySigner:
+    """OSS 直传策略签名
+
+    - 预先计算以 AccessKey Secret 为密钥的 HMAC-SHA1 状态，每次签名只需复制后追加策略
+    - 同一 (用户, 动物) 的上传凭证在有效期的大部分时间内复用，签发凭证通常只是一次内存查找
+    """
+
+    def __init__(self, cache_size: int):
+        self._cache = TTLCache(maxsize=cache_size, ttl=UPLOAD_POLICY_REUSE_SECONDS)
+        self.reset()
+
+    def reset(self) -> None:
+        """按当前配置重建签名密钥并清空已缓存的凭证"""
+        self._oss = config.oss
+        self._hmac = hmac.new(self._oss.access_key_secret.encode(), digestmod=hashlib.sha1)
+        self._cache.clear()
+
+    def sign(self, base64_policy: str) -> str:
+        """对 Base64 编码的策略签名"""
+        mac = self._hmac.copy()
+        mac.update(base64_policy.encode())
+        return base64.b64encode(mac.digest()).decode()
+
+    def upload_credentials(self, user_id: int, animal_id: int) -> OSSCredentials:
+        """获取上传到 user/{user_id}/ 目录、回调关联 animal_id 的直传凭证"""
+        key = ("upload", user_id, animal_id)
+        credentials = self._cache.get(key)
+        if credentials is not None:
+            return credentials
+
+        oss_config = self._oss
+        # 上传目录：user/{user_id}/
+        upload_dir = f"{oss_config.dir_prefix}{user_id}/"
+        now = datetime.now(timezone.utc)
+        expiration = now + timedelta(seconds=UPLOAD_POLICY_SECONDS)
+
+        # 1. 定义并编码上传回调参数
+        base64_callback = _b64_json({
+            "callbackUrl": oss_config.callback_url,
+            "callbackBody": f"object=${{object}}&size=${{size}}&mimeType=${{mimeType}}&etag=${{etag}}&animal_id={animal_id}",
+            "callbackBodyType": "application/x-www-form-urlencoded"
+        })
+
+        # 2. 定义上传策略
+        base64_policy = _b64_json({
+            "expiration": expiration.strftime('%Y-%m-%dT%H:%M:%S.%fZ'),
+            "conditions": [
+                ["content-length-range", 0, 10485760],  # 10MB
+                ["starts-with", "$key", upload_dir],
+                {"callback": base64_callback}
+            ]
+        })
+
+        # 3. 生成签名并返回凭证信息
+        credentials = OSSCredentials(
+            accessId=oss_config.access_key_id,
+            host=oss_config.host,
+            policy=base64_policy,
+            signature=self.sign(base64_policy),
+            expire=int((expiration - timedelta(seconds=10)).timestamp()),
+            callback=base64_callback,
+            dir=upload_dir
+        )
+        self._cache.set(key, credentials)
+        return credentials
+
+    def permission_credentials(self, operation_user_id: int, full_access: bool) -> PermissionCredentials:
+        """获取权限凭证，full_access 为真时授权整个用户目录前缀"""
+        key = ("permission", operation_user_id, full_access)
+        credentials = self._cache.get(key)
+        if credentials is not None:
+            return credentials
+
+        oss_config = self._oss
+        # 根据权限级别设置操作目录和权限
+        if full_access:
+            # 管理员获取全部文件权限
+            operation_dir = f"{oss_config.dir_prefix}*"
+            key_prefix = oss_config.dir_prefix
+        else:
+            # 普通用户或管理员代理操作指定用户
+            operation_dir = f"{oss_config.dir_prefix}{operation_user_id}/"
+            key_prefix = operation_dir
+
+        now = datetime.now(timezone.utc)
+        expiration = now + timedelta(seconds=PERMISSION_POLICY_SECONDS)
+
+        # 生成回调配置
+        base64_callback = _b64_json({
+            "callbackUrl": oss_config.callback_url,
+            "callbackBody": f"object=${{object}}&size=${{size}}&mimeType=${{mimeType}}&etag=${{etag}}&user_id={operation_user_id}",
+            "callbackBodyType": "application/x-www-form-urlencoded"
+        })
+
+        # 定义权限策略
+        base64_policy = _b64_json({
+            "expiration": expiration.strftime('%Y-%m-%dT%H:%M:%S.%fZ'),
+            "conditions": [
+                ["content-length-range", 0, 104857600],  # 100MB
+                ["starts-with", "$key", key_prefix]
+            ]
+        })
+
+        credentials = PermissionCredentials(
+            accessId=oss_config.access_key_id,
+            host=oss_config.host,
+            policy=base64_policy,
+            signature=self.sign(base64_policy),
+            expire=int((expiration - timedelta(seconds=60)).timestamp()),
+            dir=operation_dir,
+            permissions=["read", "write", "delete"],
+            callback=base64_callback
+        )
+        self._cache.set(key, credentials, ttl=PERMISSION_POLICY_REUSE_SECONDS)
+        return credentials
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+oss_signer = PolicySigner(cache_size=config.oss_credentials_cache_size)
+# AccessKey 或 OSS 地址可能在重新加载后改变
+on_config_reload(oss_signer.reset)
@@ -0,0 +1,48 @@
+import base64
+import json
+from datetime import datetime
+
+# 下一页游标通过响应头返回，保持列表响应体结构不变
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# 列表接口每页条数上限
+MAX_PAGE_SIZE = 100
+# 整数排序键 (ID) 的取值范围，与 64 位整数列一致，超出时不必交给数据库驱动
+MIN_CURSOR_INT = -2 ** 63
+MAX_CURSOR_INT = 2 ** 63 - 1
+
+
+def encode_cursor(*values) -> str:
+    """将排序键编码为不透明的分页游标"""
+    payload = json.dumps(
+        [value.isoformat() if isinstance(value, datetime) else value for value in values],
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types) -> tuple:
+    """解码分页游标，并按 types 转换每个排序键
+
+    游标格式不正确或整数超出 64 位范围时抛出 ValueError。
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception as e:
+        raise ValueError("无效的分页游标") from e
+
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError("无效的分页游标")
+
+    try:
+        decoded = tuple(
+            datetime.fromisoformat(value) if type_ is datetime else type_(value)
+            for type_, value in zip(types, values)
+        )
+    except (TypeError, ValueError, OverflowError) as e:
+        # OverflowError: 例如 [1e400] 解析为 inf，int(inf) 溢出
+        raise ValueError("无效的分页游标") from e
+
+    if any(type_ is int and not MIN_CURSOR_INT <= value <= MAX_CURSOR_INT for type_, value in zip(types, decoded)):
+        raise ValueError("无效的分页游标")
+    return decoded
@@ -0,0 +1,252 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import List, Optional, TextIO
+
+from sqlalchemy.exc import IntegrityError
+
+from app.config import config
+from app.db.database import AsyncSessionLocal, async_engine
+from app.db.upsert import insert_ignore_duplicates
+from app.models.photo import Photo
+
+try:
+    import fcntl
+except ImportError:  # Windows 下不支持文件锁，不接管其他进程的溢写文件
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SPILL_PREFIX = "photo_ingest-"
+SPILL_SUFFIX = ".jsonl"
+
+
+class PhotoIngestQueueFull(Exception):
+    """照片写入队列已满"""
+
+
+@dataclass(frozen=True)
+class PendingPhoto:
+    """待写入的照片记录"""
+    animal_id: int
+    photo_url: str
+    photo_file_id: str
+    user_id: int
+
+
+def _try_lock(file: TextIO) -> bool:
+    """对文件加非阻塞排他锁，文件已被其他存活进程持有时返回 False"""
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except BlockingIOError:
+        return False
+
+
+class PhotoIngestQueue:
+    """OSS 上传回调的微批写入队列
+
+    回调校验通过后先追加到本地溢写文件再放入内存队列，随即应答 OSS；
+    后台任务在积累 batch_size 条或等待 flush_interval 秒后批量写入 photos 表。
+
+    - 每个进程使用自己的溢写文件并持有文件锁，写入成功后重写为剩余的待写记录
+    - 启动时接管已退出进程遗留的溢写文件，未写入的记录不会因重启或崩溃丢失
+    - 重复的回调和重放的记录由 photo_url 唯一键去重，直接跳过
+    """
+
+    def __init__(self, spill_dir: str, batch_size: int, flush_interval: float, max_depth: int):
+        self.spill_dir = spill_dir
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_depth = max_depth
+        self._pending: List[PendingPhoto] = []
+        self._spill: Optional[TextIO] = None
+        self._spill_path: Optional[str] = None
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._insert = insert_ignore_duplicates(Photo.__table__, async_engine.dialect.name)
+        self.flushed = 0
+        self.flush_count = 0
+        self.failed_flushes = 0
+        self.dropped = 0
+        self.last_flush = 0.0
+        self.max_flush = 0.0
+        self.total_flush = 0.0
+
+    @property
+    def depth(self) -> int:
+        """尚未写入数据库的记录数"""
+        return len(self._pending)
+
+    async def start(self) -> None:
+        """打开溢写文件、接管遗留记录并启动后台写入任务"""
+        os.makedirs(self.spill_dir, exist_ok=True)
+        self._spill_path = os.path.join(
+            self.spill_dir, f"{SPILL_PREFIX}{os.getpid()}-{time.time_ns()}{SPILL_SUFFIX}"
+        )
+        orphans = self._recover()
+        self._rewrite_spill()
+        # 遗留记录已写入本进程的溢写文件，可以删除原文件
+        for orphan in orphans:
+            os.remove(orphan.name)
+            orphan.close()
+        if self._pending:
+            logger.info(f"从溢写文件恢复 {len(self._pending)} 条待写入的照片记录")
+            self._wakeup.set()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """停止后台任务并写入剩余记录，写入失败的记录保留在溢写文件中"""
+        if self._task is not None:
+            # 不取消任务，避免中断正在进行的写入
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+
+        await self.flush()
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+            if not self._pending:
+                os.remove(self._spill_path)
+
+    def put(self, photo: PendingPhoto) -> None:
+        """记录写入溢写文件后放入队列"""
+        if len(self._pending) >= self.max_depth:
+            raise PhotoIngestQueueFull()
+
+        if self._spill is not None:
+            self._spill.write(json.dumps(asdict(photo)) + "\n")
+            self._spill.flush()
+        self._pending.append(photo)
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    async def flush(self) -> None:
+        """将队列中的记录分批写入数据库"""
+        async with self._flush_lock:
+            flushed = False
+            while self._pending:
+                batch = self._pending[:self.batch_size]
+                start = time.perf_counter()
+                try:
+                    await self._write_batch(batch)
+                except Exception as e:
+                    # 数据库不可用，保留记录稍后重试
+                    self.failed_flushes += 1
+                    logger.error(f"照片记录批量写入失败，{len(self._pending)} 条记录等待重试: {e}")
+                    break
+                del self._pending[:len(batch)]
+                flushed = True
+
+                elapsed = time.perf_counter() - start
+                self.flushed += len(batch)
+                self.flush_count += 1
+                self.last_flush = elapsed
+                self.max_flush = max(self.max_flush, elapsed)
+                self.total_flush += elapsed
+
+            if flushed and self._spill is not None:
+                self._rewrite_spill()
+
+    def stats(self) -> dict:
+        """队列运行统计"""
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "flushed": self.flushed,
+            "flush_count": self.flush_count,
+            "failed_flushes": self.failed_flushes,
+            "dropped": self.dropped,
+            "last_flush_ms": self.last_flush * 1000,
+            "avg_flush_ms": self.total_flush / self.flush_count * 1000 if self.flush_count else 0.0,
+            "max_flush_ms": self.max_flush * 1000,
+        }
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def _write_batch(self, batch: List[PendingPhoto]) -> None:
+        """写入一批记录，已存在的 photo_url 由数据库跳过"""
+        rows = list({
+            photo.photo_url: {**asdict(photo), "verified": False, "best": False} for photo in batch
+        }.values())
+
+        async with AsyncSessionLocal() as db:
+            try:
+                await db.execute(self._insert, rows)
+                await db.commit()
+                return
+            except IntegrityError:
+                await db.rollback()
+
+            # 关联的动物已被删除等外键错误，逐行写入以丢弃失败的行
+            for row in rows:
+                try:
+                    await db.execute(self._insert, [row])
+                    await db.commit()
+                except IntegrityError as e:
+                    await db.rollback()
+                    self.dropped += 1
+                    logger.warning(f"丢弃无法写入的照片记录 {row['photo_url']}: {e.orig}")
+
+    def _recover(self) -> List[TextIO]:
+        """读取已退出进程遗留的溢写文件，返回仍持有锁的文件"""
+        if fcntl is None:
+            return []
+
+        orphans = []
+        for name in sorted(os.listdir(self.spill_dir)):
+            path = os.path.join(self.spill_dir, name)
+            if not (name.startswith(SPILL_PREFIX) and name.endswith(SPILL_SUFFIX)) or path == self._spill_path:
+                continue
+            file = open(path, "r", encoding="utf-8")
+            if not _try_lock(file):
+                file.close()
+                continue
+            for line in file:
+                try:
+                    self._pending.append(PendingPhoto(**json.loads(line)))
+                except (ValueError, TypeError):
+                    # 进程崩溃时最后一行可能不完整
+                    logger.warning(f"跳过溢写文件 {name} 中无法解析的记录")
+            orphans.append(file)
+        return orphans
+
+    def _rewrite_spill(self) -> None:
+        """将剩余的待写记录写入新的溢写文件并原子替换"""
+        tmp_path = self._spill_path + ".tmp"
+        spill = open(tmp_path, "w", encoding="utf-8")
+        _try_lock(spill)
+        for photo in self._pending:
+            spill.write(json.dumps(asdict(photo)) + "\n")
+        spill.flush()
+        os.fsync(spill.fileno())
+        os.replace(tmp_path, self._spill_path)
+
+        if self._spill is not None:
+            self._spill.close()
+        self._spill = spill
+
+
+photo_ingest_queue = PhotoIngestQueue(
+    spill_dir=config.photo_ingest_spill_dir,
+    batch_size=config.photo_ingest_batch_size,
+    flush_interval=config.photo_ingest_flush_interval_ms / 1000,
+    max_depth=config.photo_ingest_max_depth,
+)
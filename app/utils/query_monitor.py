@@ -0,0 +1,116 @@
+import logging
+import os
+import sys
+import time
+import traceback
+from typing import Callable
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import config
+from app.utils.metrics import current_request
+
+try:
+    from greenlet import getcurrent
+except ImportError:  # 未安装 greenlet 时只能取到同步调用栈
+    getcurrent = None
+
+logger = logging.getLogger(__name__)
+
+# 项目根目录，调用栈摘要只保留项目内的帧
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+STACK_DEPTH = 6
+PARAMS_REPR_LIMIT = 500
+
+
+class QueryBudgetExceeded(Exception):
+    """单个请求执行的语句数超过路由的查询预算"""
+
+
+def query_budget(limit: int) -> Callable:
+    """为路由处理函数指定查询预算，覆盖默认的 config.query_budget
+
+    用法:
+        @router.get("/{animal_id}")
+        @query_budget(3)
+        async def read_animal(...):
+    """
+    def decorator(endpoint: Callable) -> Callable:
+        endpoint.query_budget = limit
+        return endpoint
+    return decorator
+
+
+def stack_summary() -> str:
+    """当前调用栈中项目代码的帧
+
+    异步会话中的语句在 greenlet 内执行，其调用栈不包含发起查询的协程，
+    需要从父 greenlet 被挂起时的帧继续向上查找。
+    """
+    frames = traceback.extract_stack(sys._getframe(1))
+    if getcurrent is not None:
+        parent = getcurrent().parent
+        if parent is not None and parent.gr_frame is not None:
+            frames = traceback.extract_stack(parent.gr_frame) + frames
+
+    app_frames = [
+        frame for frame in frames
+        if frame.filename.startswith(PROJECT_ROOT)
+        and "site-packages" not in frame.filename
+        and frame.filename != __file__
+    ]
+    return " <- ".join(
+        f"{os.path.relpath(frame.filename, PROJECT_ROOT)}:{frame.lineno} {frame.name}"
+        for frame in reversed(app_frames[-STACK_DEPTH:])
+    ) or "-"
+
+
+def _params_repr(parameters) -> str:
+    text = repr(parameters)
+    if len(text) > PARAMS_REPR_LIMIT:
+        return text[:PARAMS_REPR_LIMIT] + "..."
+    return text
+
+
+def instrument_engine(engine: Engine) -> None:
+    """注册慢查询日志与查询预算检查
+
+    - 耗时超过 config.slow_query_ms 的语句连同参数、路由和调用栈摘要记录为警告
+    - 请求内执行的语句数超过预算时记录警告；调试模式下在执行超出预算的语句前抛出
+      QueryBudgetExceeded 使请求失败，以便在上线前发现 N+1 查询
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context.query_monitor_start = time.perf_counter()
+
+        stats = current_request.get()
+        if stats is None:
+            return
+        endpoint = stats.scope.get("endpoint")
+        budget = getattr(endpoint, "query_budget", config.query_budget)
+        # stats.queries 在语句执行完成后才累加，这里是本条语句之前已执行的数量
+        if not budget or stats.queries != budget:
+            return
+
+        message = (
+            f"请求 {stats.scope['method']} {stats.route} 超出查询预算 {budget}: {statement} "
+            f"[{stack_summary()}]"
+        )
+        if config.debug:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context.query_monitor_start
+        if not config.slow_query_ms or elapsed * 1000 < config.slow_query_ms:
+            return
+
+        stats = current_request.get()
+        route = f"{stats.scope['method']} {stats.route}" if stats is not None else "-"
+        logger.warning(
+            f"慢查询 {elapsed * 1000:.1f}ms 路由 {route}: {statement} "
+            f"参数 {_params_repr(parameters)} [{stack_summary()}]"
+        )
@@ -0,0 +1,81 @@
+import hashlib
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional
+
+from fastapi import Request, Response
+
+from app.utils.cache import TTLCache
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """已序列化的响应体及其 ETag"""
+    body: bytes
+    etag: str
+    headers: Dict[str, str] = field(default_factory=dict)
+
+    def to_response(self, request: Request) -> Response:
+        """生成响应，If-None-Match 命中时返回 304"""
+        headers = {**self.headers, "ETag": self.etag, "Cache-Control": "private, no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), self.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=self.body, media_type="application/json", headers=headers)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """判断 If-None-Match 请求头是否包含给定 ETag (按弱比较)"""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+class ResponseCache:
+    """按请求路径与查询参数缓存序列化后的响应
+
+    缓存键包含版本号，写操作调用 invalidate() 递增版本号后旧条目不再命中，
+    读取期间发生写入时，旧版本的结果也不会被后续请求读到。
+    缓存只在当前进程内有效，其他进程的写入依赖 TTL 过期。
+
+    - bypass(request) 为真的请求 (例如刚写入、需要读取主库的客户端) 不读取也不写入缓存
+    - invalidate() 后 settle_seconds 内不写入缓存，避免缓存只读副本上尚未复制写入的结果
+    """
+
+    def __init__(self, maxsize: int, ttl: float,
+                 bypass: Optional[Callable[[Request], bool]] = None, settle_seconds: float = 0):
+        self.version = 0
+        self.bypass = bypass
+        self.settle_seconds = settle_seconds
+        self.bypassed = 0
+        self._settled_at = 0.0
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def key(self, request: Request) -> Optional[tuple]:
+        """生成当前版本下的缓存键，请求不使用缓存时返回 None"""
+        if self.bypass is not None and self.bypass(request):
+            self.bypassed += 1
+            return None
+        return self.version, request.url.path, tuple(sorted(request.query_params.multi_items()))
+
+    def get(self, key: Optional[tuple]) -> Optional[CachedResponse]:
+        if key is None:
+            return None
+        return self._cache.get(key)
+
+    def put(self, key: Optional[tuple], body: bytes, headers: Optional[Dict[str, str]] = None) -> CachedResponse:
+        """计算强 ETag 并缓存响应体 (key 为 None 或刚失效时只生成响应，不缓存)"""
+        etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        cached = CachedResponse(body=body, etag=etag, headers=headers or {})
+        if key is not None and time.monotonic() >= self._settled_at:
+            self._cache.set(key, cached)
+        return cached
+
+    def invalidate(self) -> None:
+        """数据变更后使所有缓存失效"""
+        self.version += 1
+        self._cache.clear()
+        self._settled_at = time.monotonic() + self.settle_seconds
+
+    def stats(self) -> dict:
+        return {"version": self.version, "bypassed": self.bypassed, **self._cache.stats()}
@@ -0,0 +1,55 @@
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Type
+
+import orjson
+from pydantic import BaseModel
+from sqlalchemy import ColumnElement
+
+# 与 Pydantic 的 JSON 输出保持一致：UTC 时间以 Z 结尾
+JSON_OPTIONS = orjson.OPT_UTC_Z
+
+
+def dumps(content) -> bytes:
+    """序列化为 JSON 字节串"""
+    return orjson.dumps(content, option=JSON_OPTIONS)
+
+
+def schema_columns(
+    schema: Type[BaseModel],
+    model,
+    exclude: Iterable[str] = (),
+    overrides: Optional[Dict[str, ColumnElement]] = None,
+) -> Dict[str, ColumnElement]:
+    """按 schema 的字段顺序选取模型中的同名列，返回 字段名 -> 列
+
+    列表接口直接选取列元组并按字段名组装 dict 序列化，跳过逐行构造与校验 Pydantic 模型。
+    字段顺序与 schema 相同，输出与 response_model 序列化的结果一致。
+    overrides 用于替换需要在 SQL 中转换类型的列。
+    """
+    overrides = overrides or {}
+    exclude = set(exclude)
+    return {
+        name: overrides.get(name, getattr(model, name))
+        for name in schema.model_fields if name not in exclude
+    }
+
+
+def parse_fields(fields: Optional[str], allowed: Sequence[str], default: Sequence[str]) -> Tuple[str, ...]:
+    """解析 fields= 查询参数 (逗号分隔的字段名)，按 allowed 中的顺序返回
+
+    未提供时返回 default；id 总是包含在内，用于分页游标与定位资源。
+    包含未知字段时抛出 ValueError。
+    """
+    if fields is None:
+        requested = set(default)
+    else:
+        requested = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = requested.difference(allowed)
+        if unknown:
+            raise ValueError(f"未知字段: {', '.join(sorted(unknown))}")
+    requested.add("id")
+    return tuple(name for name in allowed if name in requested)
+
+
+def rows_to_dicts(rows: Iterable[Sequence], keys: Tuple[str, ...]) -> List[dict]:
+    """将列元组按字段名转为 dict"""
+    return [dict(zip(keys, row)) for row in rows]
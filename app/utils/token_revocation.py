@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.config import config
+from app.models.revoked_token import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+# 同步时重新读取最近这段时间（秒）内写入的记录，覆盖提交晚于上次同步的并发事务及各进程间的时钟偏差
+SYNC_OVERLAP_SECONDS = 30
+
+
+def _timestamp(value: datetime) -> float:
+    """数据库中的 UTC 时间转为时间戳"""
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+def _utc(timestamp: float) -> datetime:
+    """时间戳转为数据库中存储的 UTC 时间"""
+    return datetime.utcfromtimestamp(timestamp)
+
+
+class TokenRevocations:
+    """已吊销令牌的进程内副本
+
+    - 检查只查询两个 dict，不访问数据库
+    - 吊销写入 revoked_tokens 表并立即在当前进程生效；其他进程每隔 TOKEN_REVOCATION_SYNC_SECONDS
+      从表中读取新记录，在此之前仍可能接受已吊销的令牌
+    - 令牌过期后对应的记录在下次吊销或同步时从内存中清除，表中的过期记录在下次吊销时删除
+    """
+
+    def __init__(self):
+        # jti -> 令牌过期时间戳
+        self._jtis: Dict[str, float] = {}
+        # sub -> (此前签发的令牌均已吊销的时间戳, 记录过期时间戳)
+        self._cutoffs: Dict[str, Tuple[float, float]] = {}
+        self._synced_at: Optional[datetime] = None
+        self.rejected = 0
+        self.syncs = 0
+
+    def is_revoked(self, payload: dict) -> bool:
+        """令牌是否已被吊销 (payload 为解码后的声明)"""
+        jti = payload.get("jti")
+        if jti is not None and jti in self._jtis:
+            self.rejected += 1
+            return True
+        cutoff = self._cutoffs.get(payload.get("sub"))
+        # 旧版本签发的令牌没有 iat，视为在任何退出所有设备之前签发
+        if cutoff is not None and payload.get("iat", 0) < cutoff[0]:
+            self.rejected += 1
+            return True
+        return False
+
+    def _apply(self, jti: Optional[str], sub: Optional[str], issued_before: Optional[float], expires_at: float) -> None:
+        if jti is not None:
+            self._jtis[jti] = expires_at
+        elif sub is not None and issued_before is not None:
+            current = self._cutoffs.get(sub)
+            if current is None or issued_before > current[0]:
+                self._cutoffs[sub] = (issued_before, expires_at)
+
+    def _purge(self, now: float) -> None:
+        """清除已过期的记录"""
+        self._jtis = {jti: expires_at for jti, expires_at in self._jtis.items() if expires_at > now}
+        self._cutoffs = {sub: cutoff for sub, cutoff in self._cutoffs.items() if cutoff[1] > now}
+
+    async def _insert(self, db: AsyncSession, jti: Optional[str], sub: Optional[str],
+                      issued_before: Optional[float], expires_at: float) -> None:
+        now = datetime.utcnow()
+        db.add(RevokedToken(
+            jti=jti, sub=sub, issued_before=issued_before, expires_at=_utc(expires_at), created_at=now,
+        ))
+        await db.execute(delete(RevokedToken).filter(RevokedToken.expires_at <= now))
+        await db.commit()
+        self._apply(jti, sub, issued_before, expires_at)
+        # 单进程部署不运行同步，过期记录在每次吊销时清除，内存占用不随退出次数增长
+        self._purge(time.time())
+
+    async def revoke(self, db: AsyncSession, payload: dict) -> bool:
+        """吊销单个令牌，令牌没有 jti (旧版本签发) 时返回 False"""
+        jti = payload.get("jti")
+        exp = payload.get("exp")
+        if jti is None or exp is None:
+            return False
+        await self._insert(db, jti=jti, sub=payload.get("sub"), issued_before=None, expires_at=exp)
+        return True
+
+    async def revoke_all(self, db: AsyncSession, sub: str) -> None:
+        """吊销该用户此前签发的全部令牌"""
+        now = time.time()
+        await self._insert(
+            db, jti=None, sub=sub, issued_before=now,
+            expires_at=now + config.access_token_expire_minutes * 60,
+        )
+
+    async def sync(self, engine: AsyncEngine) -> int:
+        """读取其他进程写入的吊销记录，第一次调用时读取全部未过期的记录，返回读取的行数"""
+        now = datetime.utcnow()
+        query = select(
+            RevokedToken.jti, RevokedToken.sub, RevokedToken.issued_before, RevokedToken.expires_at
+        ).filter(RevokedToken.expires_at > now)
+        if self._synced_at is not None:
+            query = query.filter(RevokedToken.created_at > self._synced_at - timedelta(seconds=SYNC_OVERLAP_SECONDS))
+
+        async with AsyncSession(engine) as db:
+            rows = (await db.execute(query)).all()
+        for row in rows:
+            self._apply(row.jti, row.sub, row.issued_before, _timestamp(row.expires_at))
+        self._synced_at = now
+        self._purge(time.time())
+        self.syncs += 1
+        return len(rows)
+
+    def stats(self) -> dict:
+        return {
+            "tokens": len(self._jtis),
+            "users": len(self._cutoffs),
+            "rejected": self.rejected,
+            "syncs": self.syncs,
+        }
+
+
+token_revocations = TokenRevocations()
+
+
+async def run_sync(engine: AsyncEngine, interval: float) -> None:
+    """每隔 interval 秒同步一次吊销记录 (interval 为 0 时不同步，适用于单进程部署)"""
+    if not interval:
+        return
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await token_revocations.sync(engine)
+        except Exception as e:
+            logger.error(f"同步已吊销令牌失败: {e}")
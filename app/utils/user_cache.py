@@ -0,0 +1,114 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from app.config import config
+from app.models.user import User
+from app.utils.cache import TTLCache
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """已认证用户的只读快照
+
+    与数据库会话无关，可在请求之间安全共享；不包含密码哈希。
+    """
+    id: int
+    username: str
+    email: str
+    openid: Optional[str]
+    avatarUrl: Optional[str]
+    manager: Optional[int]
+    is_active: bool
+    created_at: datetime
+    updated_at: Optional[datetime]
+
+    @classmethod
+    def from_orm(cls, user: User) -> "UserSnapshot":
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            openid=user.openid,
+            avatarUrl=user.avatarUrl,
+            manager=user.manager,
+            is_active=user.is_active,
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+        )
+
+
+class UserCache:
+    """以令牌 sub (邮箱) 为键的用户快照缓存
+
+    用户记录写入时 (ORM 的 insert/update/delete) 自动失效。
+    缓存只在当前进程内有效，其他进程的写入依赖 TTL 过期。
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, email: str) -> Optional[UserSnapshot]:
+        return self._cache.get(email)
+
+    def put(self, user: User) -> UserSnapshot:
+        snapshot = UserSnapshot.from_orm(user)
+        self._cache.set(snapshot.email, snapshot)
+        return snapshot
+
+    def invalidate(self, email: str) -> None:
+        self._cache.pop(email)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+user_cache = UserCache(maxsize=config.user_cache_size, ttl=config.user_cache_ttl_seconds)
+
+
+def _changed_emails(target: User) -> set:
+    """收集被修改用户的新旧邮箱"""
+    history = inspect(target).attrs.email.history
+    emails = {target.email}
+    emails.update(history.deleted or ())
+    emails.discard(None)
+    return emails
+
+
+@event.listens_for(User, "after_insert")
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_on_write(mapper, connection, target):
+    emails = _changed_emails(target)
+    for email in emails:
+        user_cache.invalidate(email)
+
+    # 提交前其他请求可能重新缓存旧数据，提交后再失效一次
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("user_cache_dirty", set()).update(emails)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    for email in session.info.pop("user_cache_dirty", ()):
+        user_cache.invalidate(email)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop("user_cache_dirty", None)
+
+
+@event.listens_for(Session, "after_bulk_update")
+@event.listens_for(Session, "after_bulk_delete")
+def _clear_on_bulk_write(update_context):
+    # 批量 UPDATE/DELETE 无法得知具体行，直接清空
+    if update_context.mapper.class_ is User:
+        user_cache.clear()
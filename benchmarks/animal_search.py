@@ -0,0 +1,89 @@
+"""
+动物搜索基准
+
+在临时 SQLite 数据库中写入指定数量的动物，构建进程内搜索索引，
+然后对一组典型查询计时 (包括从数据库读取结果)，输出 p50/p99 延迟。
+
+用法:
+    python -m benchmarks.animal_search --animals 100000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+# 必须在导入 app 之前设置数据库地址
+_tmp_dir = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmp_dir, 'bench_search.sqlite3')}")
+
+from sqlalchemy import insert, select
+
+from app.db.database import AsyncSessionLocal, Base, async_engine, engine
+from app.models import Animal
+from app.utils.animal_search import animal_search
+
+COLORS = ["橘", "黑", "白", "三花", "狸花", "奶牛", "玳瑁", "灰", "银渐层", "蓝白"]
+TRAITS = ["很胖", "胆小", "亲人", "怕生", "爱睡觉", "喜欢晒太阳", "会握手", "尾巴很短", "眼睛是蓝色的", "叫声很大"]
+CAMPUSES = ["东校区", "西校区", "南校区", "北校区"]
+AREAS = ["食堂", "图书馆", "宿舍区", "操场", "教学楼", "实验楼", "校医院", "体育馆"]
+QUERIES = ["橘", "三花", "狸花 胆小", "图书馆", "东校区 亲人", "小橘", "银渐层 蓝色", "咪咪123", "不存在的猫", "cat"]
+
+
+def seed(count: int) -> None:
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(0)
+    rows = []
+    for i in range(count):
+        color = rng.choice(COLORS)
+        rows.append({
+            "name": f"咪咪{i}",
+            "nickname": f"小{color}{i % 100}",
+            "characteristics": f"{color}色{rng.choice(['长毛', '短毛'])}，{rng.choice(TRAITS)}，{rng.choice(TRAITS)}",
+            "campus": rng.choice(CAMPUSES),
+            "area": rng.choice(AREAS),
+        })
+    with engine.begin() as conn:
+        conn.execute(insert(Animal), rows)
+
+
+async def run(queries: int, limit: int) -> dict:
+    start = time.perf_counter()
+    await animal_search.start(async_engine)
+    build = time.perf_counter() - start
+
+    timings = {query: [] for query in QUERIES}
+    async with AsyncSessionLocal() as db:
+        for _ in range(queries):
+            for query in QUERIES:
+                start = time.perf_counter()
+                await animal_search.search(db, query, limit, select(Animal.id, Animal.name))
+                timings[query].append(time.perf_counter() - start)
+    await async_engine.dispose()
+    return {"build": build, "timings": timings}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--animals", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=50, help="每个查询的重复次数")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    seed(args.animals)
+    result = asyncio.run(run(args.queries, args.limit))
+
+    print(f"{args.animals} 只动物，索引构建 {result['build']:.2f}s，{animal_search.stats()}")
+    print(f"{'query':<16}{'p50 ms':>10}{'p99 ms':>10}")
+    for query, timings in result["timings"].items():
+        timings.sort()
+        p50 = timings[len(timings) // 2] * 1000
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000
+        print(f"{query:<16}{p50:>10.2f}{p99:>10.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
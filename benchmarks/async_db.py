@@ -0,0 +1,125 @@
+"""
+并发请求吞吐基准：同步 Session vs AsyncSession
+
+在 async def 处理函数中分别使用同步 Session (旧写法) 和 AsyncSession (新写法)
+执行相同的查询，并发发起请求，对比吞吐量与延迟。
+
+SQLite 查询几乎没有网络往返，因此每次查询额外调用 sleep(ms) 来模拟数据库往返延迟。
+
+用法:
+    python -m benchmarks.async_db --requests 200 --concurrency 50 --latency-ms 20
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# 必须在导入 app 之前设置数据库地址
+_db_file = os.path.join(tempfile.mkdtemp(), "bench_async_db.sqlite3")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_file}")
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import event, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.database import Base, SessionLocal, async_engine, engine, get_async_db
+from app.models import Animal
+
+
+def _register_sleep(dbapi_connection, connection_record):
+    """为 SQLite 连接注册 sleep(ms) 函数，用于模拟网络往返"""
+    create_function = getattr(dbapi_connection, "create_function", None)
+    if create_function is not None:
+        create_function("sleep", 1, lambda ms: time.sleep(ms / 1000) or 0)
+
+
+if engine.dialect.name == "sqlite":
+    event.listen(engine, "connect", _register_sleep)
+    event.listen(async_engine.sync_engine, "connect", _register_sleep)
+
+
+def build_app(latency_ms: int) -> FastAPI:
+    """构建包含新旧两种写法的基准应用"""
+    bench = FastAPI()
+    sleep_sql = text("SELECT sleep(:ms)") if engine.dialect.name == "sqlite" else text("SELECT SLEEP(:ms / 1000)")
+
+    @bench.get("/sync")
+    async def read_sync():
+        # 旧写法：async def 中直接调用同步 Session，阻塞事件循环
+        db = SessionLocal()
+        try:
+            db.execute(sleep_sql, {"ms": latency_ms})
+            return [a.id for a in db.execute(select(Animal).limit(10)).scalars()]
+        finally:
+            db.close()
+
+    @bench.get("/async")
+    async def read_async(db: AsyncSession = Depends(get_async_db)):
+        # 新写法：AsyncSession，等待数据库时让出事件循环
+        await db.execute(sleep_sql, {"ms": latency_ms})
+        result = await db.execute(select(Animal).limit(10))
+        return [a.id for a in result.scalars()]
+
+    return bench
+
+
+def seed(count: int):
+    """建表并写入测试数据"""
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        if db.query(Animal).count() == 0:
+            db.add_all(Animal(name=f"bench-{i}", campus="main") for i in range(count))
+            db.commit()
+
+
+async def run(app: FastAPI, path: str, total: int, concurrency: int) -> dict:
+    """以固定并发度发起请求并统计结果"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(path)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "rps": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=int, default=20)
+    parser.add_argument("--animals", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    seed(args.animals)
+    app = build_app(args.latency_ms)
+
+    print(f"requests={args.requests} concurrency={args.concurrency} latency={args.latency_ms}ms")
+    for label, path in (("同步 Session (before)", "/sync"), ("AsyncSession (after)", "/async")):
+        stats = await run(app, path, args.requests, args.concurrency)
+        print(f"{label:<24} {stats['rps']:>8.1f} req/s  p50={stats['p50_ms']:.1f}ms  p99={stats['p99_ms']:.1f}ms")
+
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
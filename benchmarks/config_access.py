@@ -0,0 +1,34 @@
+"""
+配置访问微基准
+
+对比热路径上访问 config.oss / config.database 的开销与每次重新构造配置 (重新解析 .env) 的开销。
+
+用法:
+    python -m benchmarks.config_access --number 100000
+"""
+import argparse
+import timeit
+
+from app.config import DatabaseConfig, OSSConfig, config
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=100000)
+    args = parser.parse_args(argv)
+
+    cases = [
+        ("config.oss.access_key_secret", lambda: config.oss.access_key_secret),
+        ("config.database.url", lambda: config.database.url),
+        ("OSSConfig() (重新解析 .env)", lambda: OSSConfig().access_key_secret),
+        ("DatabaseConfig().url (重新解析 .env)", lambda: DatabaseConfig().url),
+    ]
+    for label, func in cases:
+        # 重新构造配置的开销高出几个数量级，减少执行次数
+        number = args.number if label.startswith("config.") else max(1, args.number // 100)
+        seconds = min(timeit.repeat(func, number=number, repeat=3))
+        print(f"{label:<40} {seconds / number * 1e9:>12.0f} ns/次")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+列表响应序列化微基准
+
+对比动物/用户列表两种序列化方式的每行开销 (不含数据库查询):
+  - pydantic: 逐行构造 Pydantic 模型后序列化 (用户列表另按 FastAPI response_model 的方式再校验一次)
+  - rows: 直接由列元组组装 dict，用 orjson 序列化 (当前列表接口的实现)
+
+用法:
+    python -m benchmarks.list_serialization --limits 100 1000
+"""
+import argparse
+import json
+import timeit
+from datetime import datetime, timedelta
+from typing import List
+
+from pydantic import TypeAdapter
+
+from app.models import Animal, Photo, User
+from app.routers.animals import ANIMAL_FIELDS, BEST_PHOTO_COLUMNS, animal_rows_to_dicts
+from app.routers.users import USER_COLUMNS
+from app.schemas.animal import Animal as AnimalSchema
+from app.schemas.user import UserResponse
+from app.utils.serialization import dumps, rows_to_dicts
+
+animal_list_adapter = TypeAdapter(List[AnimalSchema])
+user_list_adapter = TypeAdapter(List[UserResponse])
+
+
+def make_animals(count: int):
+    """生成 ORM 对象及等价的列元组，每两只动物有一张最佳照片"""
+    now = datetime(2024, 5, 1, 12, 30, 15, 123456)
+    animals, rows = [], []
+    for i in range(1, count + 1):
+        values = {
+            "name": f"咪咪{i}", "nickname": f"小橘{i}", "gender": None,
+            "characteristics": "橘色短毛，很胖，亲人", "campus": "东校区", "area": "食堂",
+            "habit": "喜欢晒太阳", "is_active": True, "id": i,
+            "created_at": now + timedelta(seconds=i), "updated_at": None,
+            "best_photo_id": i if i % 2 else None,
+        }
+        photo_values = {
+            "animal_id": i, "photo_url": f"https://oss.example.com/user/1/{i}.jpg", "photo_file_id": f"etag{i}",
+            "shooting_date": None, "verified": True, "best": True, "id": i, "user_id": 1,
+            "created_at": now, "updated_at": None,
+        } if i % 2 else None
+        animals.append((Animal(**values), Photo(**photo_values) if photo_values else None))
+        photo_row = tuple(photo_values[key] for key in BEST_PHOTO_COLUMNS) if photo_values else (None,) * len(BEST_PHOTO_COLUMNS)
+        rows.append(tuple(values[key] for key in ANIMAL_FIELDS[:-1]) + photo_row)
+    return animals, rows
+
+
+def make_users(count: int):
+    now = datetime(2024, 5, 1, 12, 30, 15, 123456)
+    users, rows = [], []
+    for i in range(1, count + 1):
+        values = {
+            "username": f"user{i}", "email": f"user{i}@example.com", "id": i, "openid": None,
+            "avatarUrl": f"https://oss.example.com/avatar/{i}.jpg", "manager": 0, "created_at": now,
+        }
+        users.append(User(**values))
+        rows.append(tuple(values[key] for key in USER_COLUMNS))
+    return users, rows
+
+
+def animals_pydantic(animals) -> bytes:
+    result = []
+    for animal, photo in animals:
+        animal_data = AnimalSchema.model_validate(animal)
+        animal_data.best_photo = photo
+        result.append(animal_data)
+    return animal_list_adapter.dump_json(result)
+
+
+def animals_rows(rows) -> bytes:
+    return dumps(animal_rows_to_dicts(rows, ANIMAL_FIELDS))
+
+
+def users_pydantic(users) -> bytes:
+    # FastAPI 对 response_model 先校验，再转为 JSON 兼容对象，最后由 JSONResponse 编码
+    validated = user_list_adapter.validate_python(users, from_attributes=True)
+    content = user_list_adapter.dump_python(validated, mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def users_rows(rows) -> bytes:
+    return dumps(rows_to_dicts(rows, tuple(USER_COLUMNS)))
+
+
+def bench(func, arg, number: int) -> float:
+    """每行耗时 (微秒)"""
+    return min(timeit.repeat(lambda: func(arg), number=number, repeat=5)) / number
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limits", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--number", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    print(f"{'case':<24}{'limit':>8}{'pydantic us/行':>16}{'rows us/行':>14}{'加速':>8}")
+    for limit in args.limits:
+        animals, animal_rows = make_animals(limit)
+        users, user_rows = make_users(limit)
+        assert json.loads(animals_pydantic(animals)) == json.loads(animals_rows(animal_rows))
+        assert json.loads(users_pydantic(users)) == json.loads(users_rows(user_rows))
+        for label, slow, fast, data in (
+            ("GET /api/animals/", animals_pydantic, animals_rows, (animals, animal_rows)),
+            ("GET /api/users/", users_pydantic, users_rows, (users, user_rows)),
+        ):
+            before = bench(slow, data[0], args.number) / limit * 1e6
+            after = bench(fast, data[1], args.number) / limit * 1e6
+            print(f"{label:<24}{limit:>8}{before:>16.2f}{after:>14.2f}{before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""
+接口负载基准
+
+启动 main:app (默认使用临时 SQLite 数据库，也可通过 --database-url 指向已有数据库)，
+写入指定规模的测试数据，以给定并发度依次压测热点接口，输出各接口的 p50/p95/p99 延迟与吞吐量，
+并可与保存的基线对比，超出阈值时以非零状态退出。
+
+场景:
+    login            POST /api/login
+    me               GET  /api/me
+    animals          GET  /api/animals/
+    animal           GET  /api/animals/{id}
+    oss_credentials  GET  /api/photos/oss-credentials
+    oss_callback     POST /api/photos/oss-callback
+
+用法:
+    python -m benchmarks.load --animals 1000 --concurrency 32 --requests 2000 --save-baseline
+    python -m benchmarks.load --animals 1000 --concurrency 32 --requests 2000 --threshold 0.2
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from itertools import count
+
+import httpx
+
+BENCH_PASSWORD = "benchmark-password"
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+SCENARIOS = ["login", "me", "animals", "animal", "oss_credentials", "oss_callback"]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def seed(database_url: str, users: int, animals: int, photos: int) -> None:
+    """在子进程中建表并写入测试数据，避免本进程加载应用配置"""
+    script = f"""
+from app.db.database import Base, SessionLocal, engine
+from app.models import Animal, Photo, User
+from app.utils.auth import get_password_hash
+
+Base.metadata.create_all(bind=engine)
+with SessionLocal() as db:
+    if db.query(User).count() == 0:
+        hashed = get_password_hash({BENCH_PASSWORD!r})
+        db.add_all(
+            User(username=f"bench{{i}}", email=f"bench{{i}}@example.com", hashed_password=hashed, manager=1)
+            for i in range({users})
+        )
+        db.add_all(
+            Animal(name=f"bench-{{i}}", nickname=f"小{{i}}", campus=f"校区{{i % 4}}", area=f"区域{{i % 20}}",
+                   characteristics="橘色短毛，性格亲人" * 5, habit="常在食堂附近出没" * 5)
+            for i in range({animals})
+        )
+        db.commit()
+        db.add_all(
+            Photo(animal_id=i % {animals} + 1, photo_url=f"https://bench/seed/{{i}}.jpg",
+                  photo_file_id=f"etag-{{i}}", user_id=i % {users} + 1, verified=i % 2 == 0)
+            for i in range({photos})
+        )
+        db.commit()
+"""
+    env = {**os.environ, "DATABASE_URL": database_url}
+    subprocess.run([sys.executable, "-c", script], env=env, check=True)
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """最近秩百分位数"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class LoadRunner:
+    """按场景以固定并发度发起请求"""
+
+    def __init__(self, client: httpx.AsyncClient, users: int, animals: int):
+        self.client = client
+        self.users = users
+        self.animals = animals
+        self.tokens = []
+        self.upload_ids = count()
+
+    async def login(self, user_index: int) -> httpx.Response:
+        return await self.client.post("/api/login", json={
+            "email": f"bench{user_index}@example.com",
+            "password": BENCH_PASSWORD,
+        })
+
+    async def prepare(self) -> None:
+        """为每个测试用户登录一次获取令牌"""
+        for i in range(self.users):
+            response = await self.login(i)
+            response.raise_for_status()
+            self.tokens.append(response.json()["access_token"])
+
+    def auth(self) -> dict:
+        return {"Authorization": f"Bearer {random.choice(self.tokens)}"}
+
+    async def request(self, scenario: str) -> httpx.Response:
+        if scenario == "login":
+            return await self.login(random.randrange(self.users))
+        if scenario == "me":
+            return await self.client.get("/api/me", headers=self.auth())
+        if scenario == "animals":
+            return await self.client.get("/api/animals/", params={"limit": 20}, headers=self.auth())
+        if scenario == "animal":
+            return await self.client.get(f"/api/animals/{random.randint(1, self.animals)}", headers=self.auth())
+        if scenario == "oss_credentials":
+            return await self.client.get(
+                "/api/photos/oss-credentials",
+                params={"animal_id": random.randint(1, self.animals)},
+                headers=self.auth(),
+            )
+        if scenario == "oss_callback":
+            upload_id = next(self.upload_ids)
+            return await self.client.post("/api/photos/oss-callback", data={
+                "object": f"user/{random.randint(1, self.users)}/bench-{upload_id}.jpg",
+                "size": "1024",
+                "mimeType": "image/jpeg",
+                "etag": f"bench-{upload_id}",
+                "animal_id": str(random.randint(1, self.animals)),
+            })
+        raise ValueError(f"未知场景: {scenario}")
+
+    async def run(self, scenario: str, total: int, concurrency: int) -> dict:
+        """执行一个场景，返回延迟分位数与吞吐量"""
+        remaining = count()
+        latencies = []
+        errors = 0
+
+        async def worker():
+            nonlocal errors
+            while next(remaining) < total:
+                start = time.perf_counter()
+                try:
+                    response = await self.request(scenario)
+                    ok = response.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                latencies.append(time.perf_counter() - start)
+                errors += not ok
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+        latencies.sort()
+        return {
+            "requests": total,
+            "errors": errors,
+            "rps": total / elapsed,
+            "p50_ms": percentile(latencies, 0.50) * 1000,
+            "p95_ms": percentile(latencies, 0.95) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+        }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """与基线对比，p95 延迟升高或吞吐量下降超过阈值视为回归"""
+    regressions = []
+    for scenario, current in results.items():
+        base = baseline.get(scenario)
+        if base is None:
+            continue
+        if current["p95_ms"] > base["p95_ms"] * (1 + threshold):
+            regressions.append(f"{scenario}: p95 {base['p95_ms']:.1f}ms -> {current['p95_ms']:.1f}ms")
+        if current["rps"] < base["rps"] * (1 - threshold):
+            regressions.append(f"{scenario}: rps {base['rps']:.1f} -> {current['rps']:.1f}")
+        if current["errors"] > base.get("errors", 0):
+            regressions.append(f"{scenario}: errors {base.get('errors', 0)} -> {current['errors']}")
+    return regressions
+
+
+def print_results(results: dict) -> None:
+    print(f"{'scenario':<18}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for scenario, stats in results.items():
+        print(f"{scenario:<18}{stats['rps']:>10.1f}{stats['p50_ms']:>10.1f}"
+              f"{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}{stats['errors']:>8}")
+
+
+async def drive(args, base_url: str) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        runner = LoadRunner(client, args.users, args.animals)
+        await runner.prepare()
+        results = {}
+        for scenario in args.scenarios:
+            # 预热，避免首次请求的缓存未命中影响结果
+            await runner.run(scenario, min(args.requests, args.concurrency * 2), args.concurrency)
+            # 登录受 bcrypt 限制，请求数按比例减少
+            total = max(args.concurrency, args.requests // 20) if scenario == "login" else args.requests
+            results[scenario] = await runner.run(scenario, total, args.concurrency)
+        return results
+
+
+def wait_until_ready(base_url: str, server: subprocess.Popen, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("服务进程启动失败")
+        try:
+            httpx.get(f"{base_url}/openapi.json", timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError("等待服务启动超时")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="默认使用临时 SQLite 数据库")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--animals", type=int, default=1000)
+    parser.add_argument("--photos", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000, help="每个场景的请求数")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--seed", type=int, default=0, help="随机数种子")
+    parser.add_argument("--output", help="将结果写入 JSON 文件")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="将本次结果保存为基线")
+    parser.add_argument("--threshold", type=float, default=0.2, help="允许的回归比例")
+    args = parser.parse_args(argv)
+
+    random.seed(args.seed)
+    work_dir = tempfile.mkdtemp(prefix="anilog-bench-")
+    database_url = args.database_url or f"sqlite:///{os.path.join(work_dir, 'bench.sqlite3')}"
+    seed(database_url, args.users, args.animals, args.photos)
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = {
+        **os.environ,
+        "DATABASE_URL": database_url,
+        "PHOTO_INGEST_SPILL_DIR": os.path.join(work_dir, "spill"),
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env=env,
+    )
+    try:
+        wait_until_ready(base_url, server)
+        results = asyncio.run(drive(args, base_url))
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    print_results(results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+        print(f"基线已保存到 {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"未找到基线 {args.baseline}，跳过对比")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as file:
+        regressions = compare(results, json.load(file), args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION: {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""
+启动时间基准
+
+在临时 SQLite 数据库 (也可通过 --database-url 指向已有数据库) 上执行迁移并写入测试数据，
+然后按不同的 SCHEMA_STARTUP_MODE 多次启动 main:app，测量从启动进程到 GET /health
+第一次返回 200 的时间 (time-to-first-request)，以及导入 main 模块的耗时。
+中位数超过 --target-ms 时以非零状态退出。
+
+用法:
+    python -m benchmarks.startup --animals 20000 --runs 5 --target-ms 4000
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.load import free_port
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = ["migrate", "verify", "off"]
+
+
+def seed(env: dict, animals: int) -> None:
+    """在子进程中执行迁移并写入测试数据"""
+    script = f"""
+from sqlalchemy import insert
+from app.db.database import engine
+from app.db.migrations import upgrade
+from app.models import Animal
+
+with engine.begin() as conn:
+    upgrade(conn)
+    if conn.execute(Animal.__table__.select().limit(1)).first() is None:
+        conn.execute(insert(Animal), [
+            {{"name": f"bench-{{i}}", "nickname": f"小{{i}}", "campus": f"校区{{i % 4}}", "area": f"区域{{i % 20}}",
+             "characteristics": "橘色短毛，性格亲人"}}
+            for i in range({animals})
+        ])
+"""
+    subprocess.run([sys.executable, "-c", script], env=env, cwd=ROOT, check=True)
+
+
+def import_time(env: dict) -> float:
+    """在新进程中导入 main 的耗时 (秒)"""
+    script = "import time; start = time.perf_counter(); import main; print(time.perf_counter() - start)"
+    result = subprocess.run([sys.executable, "-c", script], env=env, cwd=ROOT, check=True,
+                            capture_output=True, text=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def time_to_first_request(env: dict, timeout: float = 60) -> float:
+    """启动 uvicorn 到 /health 第一次返回 200 的时间 (秒)"""
+    port = free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=ROOT, env=env,
+    )
+    try:
+        deadline = start + timeout
+        while time.perf_counter() < deadline:
+            if server.poll() is not None:
+                raise RuntimeError("服务进程启动失败")
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.01)
+        raise RuntimeError("等待服务启动超时")
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="默认使用临时 SQLite 数据库")
+    parser.add_argument("--animals", type=int, default=20000)
+    parser.add_argument("--runs", type=int, default=5, help="每种模式的启动次数")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    parser.add_argument("--target-ms", type=float, default=4000, help="time-to-first-request 中位数上限")
+    args = parser.parse_args(argv)
+
+    work_dir = tempfile.mkdtemp(prefix="anilog-startup-")
+    env = {
+        **os.environ,
+        "DATABASE_URL": args.database_url or f"sqlite:///{os.path.join(work_dir, 'startup.sqlite3')}",
+        "PHOTO_INGEST_SPILL_DIR": os.path.join(work_dir, "spill"),
+    }
+    seed(env, args.animals)
+
+    imports = sorted(import_time(env) for _ in range(args.runs))
+    print(f"import main: 中位数 {statistics.median(imports) * 1000:.0f}ms，最小 {imports[0] * 1000:.0f}ms")
+
+    print(f"{'mode':<10}{'p50 ms':>10}{'min ms':>10}{'max ms':>10}")
+    failed = []
+    for mode in args.modes:
+        timings = sorted(time_to_first_request({**env, "SCHEMA_STARTUP_MODE": mode}) for _ in range(args.runs))
+        median = statistics.median(timings) * 1000
+        print(f"{mode:<10}{median:>10.0f}{timings[0] * 1000:>10.0f}{timings[-1] * 1000:>10.0f}")
+        if median > args.target_ms:
+            failed.append(mode)
+
+    for mode in failed:
+        print(f"REGRESSION: {mode} 模式的 time-to-first-request 超过 {args.target_ms:.0f}ms")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,7 +12,8 @@ logger = logging.getLogger(__name__)
 from app.models.user import User
 from app.models.animal import Animal
 from app.models.photo import Photo
-from app.db.database import create_tables, engine, Base
+from app.db.database import engine, Base
+from app.db.migrations import upgrade
 
 def check_db_connection():
     """检查数据库连接"""
@@ -54,10 +55,11 @@ def initialize_db():
             # 检查现有表
             check_tables()
             
-            # 创建表
-            logger.info("开始创建数据库表...")
-            create_tables()
-            logger.info("数据库表创建成功!")
+            # 建表并执行未执行的迁移，记录结构版本供应用启动时比较
+            logger.info("开始执行数据库迁移...")
+            with engine.begin() as conn:
+                applied = upgrade(conn)
+            logger.info(f"数据库迁移完成: {applied or '没有未执行的迁移'}")
             
             # 检查创建后的表
             check_tables()
@@ -0,0 +1,53 @@
+"""
+动物批量导入脚本
+
+用法:
+    python import_animals.py animals.csv
+    python import_animals.py animals.jsonl --batch-size 1000
+"""
+import argparse
+import asyncio
+import logging
+import sys
+
+# 配置日志
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# 导入所有模型以确保它们被SQLAlchemy注册
+from app.models import User, Animal, Photo
+from app.config import config
+from app.db.database import AsyncSessionLocal, async_engine
+from app.utils.animal_import import IMPORT_FORMATS, detect_format, import_animals, read_rows
+
+
+async def run(path: str, fmt: str, batch_size: int) -> int:
+    """导入文件并输出错误报告，返回失败行数"""
+    with open(path, encoding="utf-8-sig", newline="") as file:
+        async with AsyncSessionLocal() as db:
+            result = await import_animals(db, read_rows(file, fmt), batch_size)
+    await async_engine.dispose()
+
+    for error in result.errors:
+        logger.warning(f"第 {error.line} 行 ({error.name}): {error.error}")
+    logger.info(f"读取 {result.total} 行，成功 {result.inserted} 行，失败 {result.failed} 行")
+    return result.failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="从 CSV 或 JSON Lines 文件批量导入动物")
+    parser.add_argument("path", help="CSV (首行为表头) 或 JSON Lines 文件")
+    parser.add_argument("--format", choices=sorted(set(IMPORT_FORMATS.values())), help="默认根据文件扩展名判断")
+    parser.add_argument("--batch-size", type=int, default=config.animal_import_batch_size)
+    args = parser.parse_args()
+
+    fmt = args.format or detect_format(args.path)
+    if fmt is None:
+        parser.error("无法识别的文件格式，请指定 --format")
+
+    failed = asyncio.run(run(args.path, fmt, args.batch_size))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,30 @@
 from app.routers import auth, users, photos, animals
-from app.db.database import create_tables, engine
+from app.db import migrations
+from app.db.database import async_engine, engine, pool_stats
+from app.db.replicas import ReadYourWritesMiddleware, replica_router
+from app.utils.auth import PasswordHashPoolFull, password_hash_pool, token_cache
+from app.config import config, reload_config
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from app.utils.photo_ingest import photo_ingest_queue
+from app.utils.metrics import MetricsMiddleware, metrics
+from app.utils import query_monitor
+from app.utils.user_cache import user_cache
+from app.utils.known_animals import known_animals
+from app.utils.oss import oss_signer
+from app.utils.animal_search import animal_search, run_rebuilder as run_search_rebuilder
+from app.utils.animal_facets import run_reconciler
+from app.utils.token_revocation import run_sync as run_token_revocation_sync, token_revocations
 from app.models import User, Animal, Photo
+import asyncio
 import logging
+import signal
+import threading
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 
 # 配置日志
 logging.basicConfig(level=logging.INFO,
@@ -15,19 +34,61 @@ logger = logging.getLogger(__name__)
 # 确保首先导入所有模型
 
 
+def handle_sighup():
+    """收到 SIGHUP 时重新加载配置"""
+    reload_config()
+    logger.info("配置已重新加载")
+
+
+def install_sighup_handler() -> bool:
+    """在主线程的事件循环上注册 SIGHUP 处理函数"""
+    if not hasattr(signal, "SIGHUP") or threading.current_thread() is not threading.main_thread():
+        return False
+    asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, handle_sighup)
+    return True
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # 启动时执行
+    sighup_installed = install_sighup_handler()
+
     try:
-        with engine.connect() as conn:
-            logger.info("数据库连接成功")
-        logger.info("创建数据库表...")
-        create_tables()
-        logger.info("数据库表创建完成")
+        await migrations.prepare(async_engine, config.schema_startup_mode)
+    except migrations.SchemaMismatch:
+        raise
     except Exception as e:
         logger.error(f"启动错误: {e}")
 
+    # 接受请求前载入已吊销的令牌；失败时由后台同步重试
+    try:
+        await token_revocations.sync(async_engine)
+    except Exception as e:
+        logger.error(f"载入已吊销令牌失败: {e}")
+
+    # 搜索索引在后台构建，不推迟其他接口的第一个请求
+    search_warm_up = asyncio.create_task(animal_search.warm_up(async_engine))
+    await photo_ingest_queue.start()
+    facet_reconciler = asyncio.create_task(run_reconciler(
+        async_engine, config.facet_reconcile_interval_seconds, on_change=animals.response_cache.invalidate
+    ))
+    token_revocation_sync = asyncio.create_task(
+        run_token_revocation_sync(async_engine, config.token_revocation_sync_seconds)
+    )
+    search_rebuilder = asyncio.create_task(run_search_rebuilder(async_engine, config.search_index_rebuild_seconds))
+
     yield
+    # 等待后台任务真正结束后再关闭连接池，避免取消到一半的查询占住连接
+    background = [search_warm_up, facet_reconciler, token_revocation_sync, search_rebuilder]
+    for task in background:
+        task.cancel()
+    await asyncio.gather(*background, return_exceptions=True)
+    await photo_ingest_queue.stop()
+    if sighup_installed:
+        asyncio.get_running_loop().remove_signal_handler(signal.SIGHUP)
+    logger.info(f"数据库连接池状态: {pool_stats(async_engine)}")
+    await async_engine.dispose()
+    await replica_router.dispose()
     logger.info("应用关闭")
 
 app = FastAPI(
@@ -37,6 +98,28 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# 请求与数据库指标
+metrics.instrument_engine(engine, "sync")
+metrics.instrument_engine(async_engine.sync_engine, "async")
+query_monitor.instrument_engine(engine)
+query_monitor.instrument_engine(async_engine.sync_engine)
+for replica in replica_router.replicas:
+    metrics.instrument_engine(replica.engine.sync_engine, replica.name)
+    query_monitor.instrument_engine(replica.engine.sync_engine)
+metrics.register_component("password_hash_pool", password_hash_pool.stats)
+metrics.register_component("user_cache", user_cache.stats)
+metrics.register_component("token_cache", token_cache.stats)
+metrics.register_component("token_revocations", token_revocations.stats)
+metrics.register_component("animal_response_cache", animals.response_cache.stats)
+metrics.register_component("known_animals", known_animals.stats)
+metrics.register_component("photo_ingest", photo_ingest_queue.stats)
+metrics.register_component("oss_credentials_cache", oss_signer.stats)
+metrics.register_component("db_pool", lambda: pool_stats(async_engine))
+metrics.register_component("db_replicas", replica_router.stats)
+metrics.register_component("animal_search", animal_search.stats)
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(MetricsMiddleware)
+
 # 配置CORS
 app.add_middleware(
     CORSMiddleware,
@@ -44,11 +127,32 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
 # 全局异常处理
 
 
+@app.exception_handler(PasswordHashPoolFull)
+async def password_hash_pool_full_handler(request: Request, exc: PasswordHashPoolFull):
+    logger.warning("密码哈希线程池已饱和，拒绝请求")
+    return JSONResponse(
+        status_code=503,
+        content={"message": "服务繁忙，请稍后重试"},
+        headers={"Retry-After": "1"}
+    )
+
+
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    logger.warning(f"获取数据库连接超时，连接池状态: {pool_stats(async_engine)}")
+    return JSONResponse(
+        status_code=503,
+        content={"message": "服务繁忙，请稍后重试"},
+        headers={"Retry-After": "1"}
+    )
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     logger.error(f"Global exception: {exc}")
@@ -64,6 +168,28 @@ app.include_router(photos.router, prefix="/api/photos", tags=["图片"])
 app.include_router(animals.router, prefix="/api/animals", tags=["动物"])
 
 
+@app.get("/health", include_in_schema=False)
+async def health():
+    """健康检查：数据库可用性与连接池状态"""
+    try:
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    except Exception as e:
+        logger.error(f"健康检查失败: {e}")
+        return JSONResponse(
+            status_code=503,
+            content={"status": "unavailable", "database": False, "pool": pool_stats(async_engine)}
+        )
+    return {"status": "ok", "database": True, "pool": pool_stats(async_engine)}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def read_metrics():
+    """Prometheus 指标"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
+    # 开发环境：单进程并自动重载；生产环境使用 python serve.py
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,120 @@
+"""
+生产环境启动入口
+
+由 gunicorn 管理多个 uvicorn 工作进程，参数取自 AppConfig.server (环境变量 / .env):
+  - WEB_CONCURRENCY 个工作进程 (默认 CPU 核数)，每个进程有独立的事件循环与数据库连接池
+  - 已安装时使用 uvloop 事件循环与 httptools 解析器
+  - keep-alive 超时、监听队列长度、优雅退出超时、处理一定请求数后重启工作进程
+  - 默认 preload：主进程导入应用并执行一次数据库迁移后再创建工作进程
+
+用法:
+    python serve.py
+    kill -HUP <主进程 PID>    重新读取配置并平滑替换全部工作进程
+
+工作进程不自行重新读取配置，全部继承主进程的同一份快照 (例如 SECRET_KEY)。
+
+开发环境使用 python main.py (自动重载)。
+"""
+import logging
+
+from gunicorn.app.base import BaseApplication
+from uvicorn.workers import UvicornWorker
+
+from app.config import config, reload_config
+
+logger = logging.getLogger(__name__)
+
+
+def worker_kwargs() -> dict:
+    """传给 uvicorn 的参数"""
+    return {
+        "loop": config.server.loop,
+        "http": config.server.http,
+        "timeout_graceful_shutdown": config.server.graceful_timeout,
+    }
+
+
+class Worker(UvicornWorker):
+    """按配置选择事件循环与 HTTP 解析器的 uvicorn 工作进程"""
+
+    CONFIG_KWARGS = worker_kwargs()
+
+
+def migrate_once() -> None:
+    """在主进程中执行迁移，工作进程启动时只需比较一次结构版本"""
+    from app.db.database import engine
+    from app.db.migrations import upgrade
+
+    with engine.begin() as conn:
+        applied = upgrade(conn)
+    engine.dispose()
+    if applied:
+        logger.info(f"数据库迁移完成: {applied}")
+
+
+def post_fork(server, worker) -> None:
+    """工作进程创建后：丢弃从主进程继承的连接"""
+    from app.db.database import async_engine, engine
+    from app.db.replicas import replica_router
+
+    # close=False：连接仍属于主进程，只在本进程中丢弃，不向数据库发送关闭
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
+    for replica in replica_router.replicas:
+        replica.engine.sync_engine.dispose(close=False)
+
+
+class Server(BaseApplication):
+    """以代码而非配置文件提供 gunicorn 参数"""
+
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def reload(self):
+        """主进程收到 SIGHUP：先重新读取配置，gunicorn 随后按新参数创建工作进程并替换旧进程
+
+        数据库引擎等在导入时创建的对象不会重建，数据库配置的修改仍需重启服务。
+        """
+        reload_config()
+        self.options = options()
+        Worker.CONFIG_KWARGS = worker_kwargs()
+        super().reload()
+        logger.info("配置已重新加载")
+
+    def load(self):
+        from main import app
+        return app
+
+
+def options() -> dict:
+    server = config.server
+    return {
+        "bind": f"{server.host}:{server.port}",
+        "workers": server.worker_count,
+        "worker_class": "serve.Worker",
+        "keepalive": server.keepalive,
+        "backlog": server.backlog,
+        "graceful_timeout": server.graceful_timeout,
+        "max_requests": server.max_requests,
+        "max_requests_jitter": server.max_requests_jitter,
+        "preload_app": server.preload,
+        "post_fork": post_fork,
+    }
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if config.schema_startup_mode == "migrate":
+        from app.db.migrations import SchemaMismatch
+
+        try:
+            migrate_once()
+        except SchemaMismatch as e:
+            logger.error(e)
+            raise SystemExit(1)
+    Server(options()).run()
@@ -0,0 +1,73 @@
+"""
+测试使用临时 SQLite 数据库，并开启调试模式 (超出查询预算的请求直接失败)
+
+用法:
+    pip install -r tests/requirements.txt
+    python -m pytest
+"""
+import os
+import tempfile
+from itertools import count
+
+# 必须在导入 app 之前设置
+_tmp_dir = tempfile.mkdtemp(prefix="anilog-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'test.sqlite3')}"
+os.environ["PHOTO_INGEST_SPILL_DIR"] = os.path.join(_tmp_dir, "spill")
+os.environ["DB_REPLICA_URLS"] = ""
+os.environ["DEBUG"] = "true"
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+
+from app.db.database import SessionLocal
+from app.models import User
+from main import app
+
+PASSWORD = "test-password"
+_names = count(1)
+
+
+@pytest.fixture(scope="session")
+def tmp_dir() -> str:
+    return _tmp_dir
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+def create_user(client: TestClient, manager: int = 0) -> dict:
+    """注册并登录一个新用户，返回 Bearer 认证头"""
+    name = f"user{next(_names)}"
+    email = f"{name}@example.com"
+    response = client.post("/api/users/", json={"username": name, "email": email, "password": PASSWORD})
+    assert response.status_code == 201, response.text
+    if manager:
+        with SessionLocal() as db:
+            db.execute(update(User).filter(User.email == email).values(manager=manager))
+            db.commit()
+
+    response = client.post("/api/login", json={"email": email, "password": PASSWORD})
+    assert response.status_code == 200, response.text
+    # 登录会设置 Cookie，Cookie 优先于 Authorization 头，清除后各用户互不影响
+    client.cookies.clear()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture(scope="session")
+def user_headers(client) -> dict:
+    return create_user(client)
+
+
+@pytest.fixture(scope="session")
+def manager_headers(client) -> dict:
+    return create_user(client, manager=3)
+
+
+def create_animal(client: TestClient, headers: dict, **fields) -> dict:
+    response = client.post("/api/animals/", json={"name": f"animal{next(_names)}", **fields}, headers=headers)
+    assert response.status_code == 201, response.text
+    return response.json()
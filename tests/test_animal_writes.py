@@ -0,0 +1,71 @@
+from sqlalchemy import insert, select
+
+from app.db.database import SessionLocal, engine
+from app.models import Animal, Photo
+from conftest import create_animal
+
+
+def add_photos(animal_id: int, count: int):
+    with engine.begin() as conn:
+        return [
+            conn.execute(insert(Photo).values(
+                animal_id=animal_id, user_id=1, photo_url=f"https://example.com/writes/{animal_id}/{i}.jpg",
+            )).inserted_primary_key[0]
+            for i in range(count)
+        ]
+
+
+def best_flags(animal_id: int) -> dict:
+    with SessionLocal() as db:
+        return dict(db.execute(select(Photo.id, Photo.best).filter(Photo.animal_id == animal_id)).all())
+
+
+def test_set_best_photo_keeps_one_best(client, manager_headers):
+    animal = create_animal(client, manager_headers)
+    other = create_animal(client, manager_headers)
+    first, second = add_photos(animal["id"], 2)
+    (foreign,) = add_photos(other["id"], 1)
+    path = f"/api/animals/{animal['id']}/best-photo"
+
+    response = client.put(path, json={"photo_id": first}, headers=manager_headers)
+    assert response.status_code == 200
+    assert response.json()["best_photo"]["id"] == first
+    assert best_flags(animal["id"]) == {first: True, second: False}
+
+    response = client.put(path, json={"photo_id": second}, headers=manager_headers)
+    assert response.json()["best_photo_id"] == second
+    assert best_flags(animal["id"]) == {first: False, second: True}
+
+    # 其他动物的照片与不存在的动物
+    assert client.put(path, json={"photo_id": foreign}, headers=manager_headers).status_code == 404
+    assert client.put("/api/animals/0/best-photo", json={"photo_id": None}, headers=manager_headers).status_code == 404
+    assert best_flags(animal["id"]) == {first: False, second: True}
+
+    response = client.put(path, json={"photo_id": None}, headers=manager_headers)
+    assert response.json()["best_photo"] is None
+    assert best_flags(animal["id"]) == {first: False, second: False}
+
+
+def test_update_returns_best_photo(client, manager_headers):
+    animal = create_animal(client, manager_headers)
+    (photo_id,) = add_photos(animal["id"], 1)
+    client.put(f"/api/animals/{animal['id']}/best-photo", json={"photo_id": photo_id}, headers=manager_headers)
+
+    response = client.put(
+        f"/api/animals/{animal['id']}", json={"name": animal["name"], "campus": "北校区"}, headers=manager_headers
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["campus"] == "北校区"
+    assert body["updated_at"] is not None
+    assert body["best_photo"]["id"] == photo_id
+
+
+def test_delete_unlinks_photos(client, manager_headers):
+    animal = create_animal(client, manager_headers)
+    photo_ids = add_photos(animal["id"], 2)
+
+    assert client.delete(f"/api/animals/{animal['id']}", headers=manager_headers).status_code == 204
+    with SessionLocal() as db:
+        assert db.get(Animal, animal["id"]) is None
+        assert set(db.scalars(select(Photo.animal_id).filter(Photo.id.in_(photo_ids)))) == {None}
@@ -0,0 +1,66 @@
+"""
+重复 OSS 回调的并发检查
+
+模拟 OSS 重试：同一上传的回调被并发投递多次，并由多个写入队列 (对应多个进程) 同时重放。
+每个 photo_url 只应产生一行记录，所有回调都返回 200，写入过程没有失败。
+"""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import select
+
+from app.config import config
+from app.db.database import SessionLocal
+from app.models import Photo
+from app.utils.photo_ingest import PendingPhoto, PhotoIngestQueue, photo_ingest_queue
+from conftest import create_animal
+
+UPLOADS = 5
+DUPLICATES = 4
+WORKERS = 3
+
+
+def photo_url(animal_id: int, i: int) -> str:
+    return f"{config.oss.host}/user/1/dup-{animal_id}-{i}.jpg"
+
+
+def test_duplicate_callbacks_store_one_row_per_upload(client, manager_headers, tmp_dir):
+    animal_id = create_animal(client, manager_headers)["id"]
+
+    def callback(i: int) -> int:
+        response = client.post("/api/photos/oss-callback", data={
+            "object": f"user/1/dup-{animal_id}-{i}.jpg",
+            "size": "1",
+            "mimeType": "image/jpeg",
+            "etag": f"etag-{i}",
+            "animal_id": str(animal_id),
+        })
+        return response.status_code
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        statuses = list(executor.map(callback, [i for i in range(UPLOADS) for _ in range(DUPLICATES)]))
+    assert statuses == [200] * (UPLOADS * DUPLICATES)
+
+    async def replay_from_workers() -> list:
+        await photo_ingest_queue.flush()
+        queues = [
+            PhotoIngestQueue(os.path.join(tmp_dir, f"dup-worker-{i}"), batch_size=UPLOADS, flush_interval=60,
+                             max_depth=UPLOADS)
+            for i in range(WORKERS)
+        ]
+        for queue in queues:
+            await queue.start()
+            for i in range(UPLOADS):
+                queue.put(PendingPhoto(animal_id, photo_url(animal_id, i), f"etag-{i}", 1))
+        # 同时停止，各队列并发写入相同的记录
+        await asyncio.gather(*(queue.stop() for queue in queues))
+        return [queue.stats() for queue in queues]
+
+    # 写入队列与应用共用事件循环中的连接池
+    worker_stats = client.portal.call(replay_from_workers)
+    assert not any(stats["failed_flushes"] or stats["dropped"] for stats in worker_stats), worker_stats
+
+    with SessionLocal() as db:
+        urls = db.execute(select(Photo.photo_url).filter(Photo.animal_id == animal_id)).scalars().all()
+    assert sorted(urls) == sorted(photo_url(animal_id, i) for i in range(UPLOADS))
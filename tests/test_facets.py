@@ -0,0 +1,33 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from sqlalchemy import select
+
+from app.db.database import SessionLocal
+from app.models import AnimalFacet
+
+# 只导入模型与数据库的脚本 (例如初始化、导入脚本) 通过 ORM 写入动物
+SCRIPT = """
+from app.db.database import SessionLocal
+from app.models import Animal
+
+with SessionLocal() as db:
+    db.add(Animal(name="facet-script", campus="脚本校区"))
+    db.commit()
+"""
+
+
+def campus_count(campus: str) -> int:
+    with SessionLocal() as db:
+        count = db.scalar(
+            select(AnimalFacet.count).filter(AnimalFacet.facet == "campus", AnimalFacet.value == campus)
+        )
+    return count or 0
+
+
+def test_script_writes_update_facet_counts(client):
+    before = campus_count("脚本校区")
+    root = Path(__file__).resolve().parent.parent
+    subprocess.run([sys.executable, "-c", SCRIPT], cwd=root, check=True)
+    assert campus_count("脚本校区") == before + 1
@@ -0,0 +1,58 @@
+import os
+
+import pytest
+from sqlalchemy import create_engine, select, update
+
+from app.db.migrations import SchemaMismatch, check, fingerprint, head, upgrade, version_table
+
+
+@pytest.fixture
+def engine(tmp_dir):
+    engine = create_engine(f"sqlite:///{os.path.join(tmp_dir, 'migrations.sqlite3')}")
+    try:
+        yield engine
+    finally:
+        engine.dispose()
+        os.remove(os.path.join(tmp_dir, "migrations.sqlite3"))
+
+
+def test_model_change_without_migration_is_refused(engine):
+    with engine.begin() as conn:
+        upgrade(conn)
+        assert check(conn) is None
+        # 模拟模型变更后没有编写迁移：记录的指纹与当前模型不同
+        conn.execute(update(version_table).values(fingerprint="0" * 64))
+
+    with pytest.raises(SchemaMismatch):
+        with engine.begin() as conn:
+            upgrade(conn)
+
+    # 不会悄悄改写为当前模型的指纹
+    with engine.connect() as conn:
+        stored = conn.execute(select(version_table.c.fingerprint).filter(version_table.c.revision == head())).scalar()
+    assert stored == "0" * 64
+    assert stored != fingerprint()
+
+
+def test_upgrade_is_idempotent(engine):
+    for _ in range(2):
+        with engine.begin() as conn:
+            upgrade(conn)
+    with engine.connect() as conn:
+        assert check(conn) is None
+
+
+def test_revoked_tokens_migration_matches_model():
+    from sqlalchemy.dialects import mysql
+    from sqlalchemy.schema import CreateIndex, CreateTable
+
+    from app.db.migrations.m0005_revoked_tokens import revoked_tokens
+    from app.models import RevokedToken
+
+    dialect = mysql.dialect()
+    model = RevokedToken.__table__
+    assert str(CreateTable(revoked_tokens).compile(dialect=dialect)) == str(CreateTable(model).compile(dialect=dialect))
+    assert sorted(str(CreateIndex(index).compile(dialect=dialect)) for index in revoked_tokens.indexes) == \
+        sorted(str(CreateIndex(index).compile(dialect=dialect)) for index in model.indexes)
+    # MySQL 的 FLOAT 为单精度，时间戳需要 DOUBLE
+    assert "issued_before DOUBLE" in str(CreateTable(model).compile(dialect=dialect))
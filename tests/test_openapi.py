@@ -0,0 +1,42 @@
+import pytest
+
+from app.routers.animals import ANIMAL_FIELDS
+from app.routers.users import USER_COLUMNS
+from app.schemas.animal import AnimalFields
+from app.schemas.user import UserFields
+from conftest import create_animal
+
+
+def test_field_schemas_match_selectable_fields():
+    assert set(AnimalFields.model_fields) == set(ANIMAL_FIELDS)
+    assert set(UserFields.model_fields) == set(USER_COLUMNS)
+
+
+@pytest.mark.parametrize("path, schema, is_list", [
+    ("/api/animals/", "AnimalFields", True),
+    ("/api/animals/search", "AnimalFields", True),
+    ("/api/animals/{animal_id}", "AnimalFields", False),
+    ("/api/users/", "UserFields", True),
+    ("/api/users/{user_id}", "UserFields", False),
+])
+def test_documented_schema_is_sparse(client, path, schema, is_list):
+    openapi = client.get("/openapi.json").json()
+    documented = openapi["paths"][path]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+    if is_list:
+        documented = documented["items"]
+    assert documented == {"$ref": f"#/components/schemas/{schema}"}
+    # 只有 id 总是返回
+    assert openapi["components"]["schemas"][schema]["required"] == ["id"]
+
+
+def test_sparse_responses_match_documented_fields(client, manager_headers):
+    animal = create_animal(client, manager_headers)
+    properties = set(AnimalFields.model_fields)
+    for params in ({}, {"fields": "name"}):
+        response = client.get("/api/animals/", params=params, headers=manager_headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        for item in response.json():
+            assert "id" in item and set(item) <= properties
+    detail = client.get(f"/api/animals/{animal['id']}", params={"fields": "campus"}, headers=manager_headers)
+    assert detail.json() == {"id": animal["id"], "campus": None}
@@ -0,0 +1,75 @@
+import pytest
+
+from app.utils.pagination import encode_cursor
+from conftest import create_animal, create_user
+
+
+@pytest.fixture(scope="module", autouse=True)
+def seed(client, manager_headers):
+    for _ in range(3):
+        create_animal(client, manager_headers)
+        create_user(client)
+
+
+@pytest.mark.parametrize("path", ["/api/animals/", "/api/users/"])
+@pytest.mark.parametrize("params", [{"limit": 0}, {"limit": -1}, {"limit": 101}, {"skip": -1}])
+def test_invalid_page_parameters(client, user_headers, path, params):
+    response = client.get(path, params=params, headers=user_headers)
+    assert response.status_code == 422
+
+
+@pytest.mark.parametrize("path", ["/api/animals/", "/api/users/"])
+def test_cursor_pages(client, user_headers, path):
+    ids = [item["id"] for item in client.get(path, params={"limit": 100}, headers=user_headers).json()]
+    assert len(ids) >= 3
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get(path, params=params, headers=user_headers)
+        assert response.status_code == 200
+        seen.extend(item["id"] for item in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert seen == ids
+
+
+@pytest.mark.parametrize("path", ["/api/animals/", "/api/users/"])
+def test_empty_page_has_no_cursor(client, user_headers, path):
+    response = client.get(path, params={"skip": 100000, "limit": 1}, headers=user_headers)
+    assert response.status_code == 200
+    assert response.json() == []
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_photos_limit_validated(client, user_headers, manager_headers):
+    animal = create_animal(client, manager_headers)
+    for limit in (0, -1, 101):
+        response = client.get(f"/api/animals/{animal['id']}/photos", params={"limit": limit}, headers=user_headers)
+        assert response.status_code == 422
+
+
+@pytest.mark.parametrize("path", ["/api/animals/", "/api/users/"])
+@pytest.mark.parametrize("cursor", [
+    "WzFlNDAwXQ",  # [1e400]，int(inf) 溢出
+    encode_cursor(2 ** 63),
+    encode_cursor(-2 ** 63 - 1),
+    encode_cursor("x"),
+    encode_cursor(None),
+    encode_cursor(1, 2),
+    "e30",  # {}
+    "not-base64!",
+])
+def test_invalid_cursor(client, user_headers, path, cursor):
+    response = client.get(path, params={"cursor": cursor}, headers=user_headers)
+    assert response.status_code == 400
+
+
+def test_invalid_photo_cursor(client, user_headers, manager_headers):
+    animal = create_animal(client, manager_headers)
+    for values in (["2024-01-01T00:00:00", 1e400], ["2024-01-01T00:00:00", 2 ** 64], [1, 1]):
+        response = client.get(
+            f"/api/animals/{animal['id']}/photos", params={"cursor": encode_cursor(*values)}, headers=user_headers
+        )
+        assert response.status_code == 400
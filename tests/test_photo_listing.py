@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import and_, insert, or_, text
+
+from app.db.database import engine
+from app.models import Photo
+from app.routers.animals import photo_page_query
+from conftest import create_animal
+
+
+@pytest.fixture(scope="module")
+def animal_id(client, manager_headers):
+    animal = create_animal(client, manager_headers)
+    start = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(Photo), [
+            {"animal_id": animal["id"], "user_id": 1, "photo_url": f"https://example.com/listing/{i}.jpg",
+             "verified": i % 2 == 0, "created_at": start + timedelta(minutes=i // 2)}
+            for i in range(200)
+        ])
+        conn.execute(text("ANALYZE"))
+    return animal["id"]
+
+
+def query_plan(query) -> str:
+    with engine.connect() as conn:
+        compiled = query.compile(conn, compile_kwargs={"literal_binds": True})
+        return "\n".join(row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {compiled}")))
+
+
+@pytest.mark.parametrize("verified, index", [
+    (None, "ix_photos_animal_created"),
+    (True, "ix_photos_animal_verified_created"),
+    (False, "ix_photos_animal_verified_created"),
+])
+def test_page_query_uses_index_order(animal_id, verified, index):
+    query = photo_page_query(animal_id, verified)
+    cursor_query = query.filter(or_(
+        Photo.created_at < datetime(2024, 1, 1, 1),
+        and_(Photo.created_at == datetime(2024, 1, 1, 1), Photo.id < 100),
+    ))
+    for plan in (query_plan(query.limit(20)), query_plan(cursor_query.limit(20))):
+        assert index in plan
+        assert "TEMP B-TREE" not in plan
+
+
+@pytest.mark.parametrize("verified", [None, True, False])
+def test_pages_are_ordered_and_complete(client, user_headers, animal_id, verified):
+    params = {"limit": 7, **({"verified": verified} if verified is not None else {})}
+    seen = []
+    while True:
+        response = client.get(f"/api/animals/{animal_id}/photos", params=params, headers=user_headers)
+        assert response.status_code == 200
+        seen.extend(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        params["cursor"] = cursor
+
+    assert len(seen) == (200 if verified is None else 100)
+    assert len({photo["id"] for photo in seen}) == len(seen)
+    keys = [(photo["created_at"], photo["id"]) for photo in seen]
+    assert keys == sorted(keys, reverse=True)
+    if verified is not None:
+        assert all(photo["verified"] is verified for photo in seen)
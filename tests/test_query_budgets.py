@@ -0,0 +1,93 @@
+"""
+在调试模式下 (超出查询预算时请求失败) 以冷缓存调用每个指定了查询预算的路由
+
+每次请求前清空用户缓存与响应缓存，使认证与读取都走数据库，覆盖语句最多的路径。
+"""
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event, insert
+
+from app.db.database import async_engine, engine
+from app.models import Photo
+from app.routers import animals
+from app.utils.metrics import current_request
+from app.utils.user_cache import user_cache
+from conftest import create_animal
+
+
+@contextmanager
+def count_statements():
+    """统计请求内执行的语句 (与查询预算检查相同，按 current_request 判断)
+
+    同一引擎上还有后台任务 (同步已吊销令牌、照片批量写入、分组计数核对) 执行的语句，不计入请求。
+    """
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        if current_request.get() is not None:
+            statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+def budget_of(client, method: str, path: str) -> int:
+    for route in client.app.routes:
+        if getattr(route, "path", None) == path and method in route.methods:
+            return route.endpoint.query_budget
+    raise AssertionError(f"未找到路由 {method} {path}")
+
+
+@pytest.fixture
+def cold(client):
+    """清空缓存后发送请求，返回响应与执行的语句数"""
+    def request(method: str, url: str, **kwargs):
+        user_cache.clear()
+        animals.response_cache.invalidate()
+        with count_statements() as statements:
+            response = client.request(method, url, **kwargs)
+        assert response.status_code < 500, response.text
+        return response, len(statements)
+    return request
+
+
+def test_every_budgeted_route_within_budget(client, cold, manager_headers):
+    headers = manager_headers
+    animal = create_animal(client, headers, campus="东校区", area="食堂", characteristics="橘猫")
+    animal_id = animal["id"]
+    with engine.begin() as conn:
+        conn.execute(insert(Photo), [
+            {"animal_id": animal_id, "user_id": 1, "photo_url": f"https://example.com/budget/{i}.jpg", "verified": True}
+            for i in range(3)
+        ])
+    photo_id = client.get(f"/api/animals/{animal_id}/photos", headers=headers).json()[0]["id"]
+
+    # 按顺序执行，后面的调用依赖前面的写入 (例如设置最佳照片后，更新与搜索需要额外读取最佳照片)
+    calls = [
+        ("POST", "/api/animals/", "/api/animals/", {"json": {"name": "budget-new", "campus": "西校区"}}),
+        ("GET", "/api/animals/", "/api/animals/", {"params": {"limit": 5}}),
+        ("GET", "/api/animals/", "/api/animals/", {"params": {"cursor": "WzBd", "fields": "name,best_photo"}}),
+        ("GET", "/api/animals/facets", "/api/animals/facets", {}),
+        ("GET", "/api/animals/{animal_id}/photos", f"/api/animals/{animal_id}/photos", {"params": {"limit": 2}}),
+        ("GET", "/api/animals/{animal_id}/photos", f"/api/animals/{animal_id}/photos",
+         {"params": {"verified": True, "best": False, "limit": 2}}),
+        ("PUT", "/api/animals/{animal_id}/best-photo", f"/api/animals/{animal_id}/best-photo",
+         {"json": {"photo_id": photo_id}}),
+        ("GET", "/api/animals/{animal_id}", f"/api/animals/{animal_id}", {}),
+        ("GET", "/api/animals/{animal_id}/photos", f"/api/animals/{animal_id}/photos", {"params": {"best": True}}),
+        ("PUT", "/api/animals/{animal_id}", f"/api/animals/{animal_id}",
+         {"json": {"name": "budget-renamed", "campus": "南校区", "characteristics": "橘猫"}}),
+        ("GET", "/api/animals/search", "/api/animals/search", {"params": {"q": "橘猫"}}),
+        ("PUT", "/api/animals/{animal_id}/best-photo", f"/api/animals/{animal_id}/best-photo",
+         {"json": {"photo_id": None}}),
+        ("DELETE", "/api/animals/{animal_id}", f"/api/animals/{animal_id}", {}),
+    ]
+    for method, route, url, kwargs in calls:
+        response, statements = cold(method, url, headers=headers, **kwargs)
+        assert response.status_code in (200, 201, 204), (method, url, response.text)
+        budget = budget_of(client, method, route)
+        assert statements <= budget, (method, url, statements, budget)
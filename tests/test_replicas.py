@@ -0,0 +1,99 @@
+import os
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db.database import ASYNC_DATABASE_URL, engine_options
+from app.db.replicas import PIN_COOKIE, Replica, replica_router
+from app.routers.animals import response_cache
+from conftest import create_animal
+
+
+@pytest.fixture
+def replica(client):
+    """以同一个 SQLite 文件作为只读副本，统计副本连接池的取出次数"""
+    engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL))
+    replica = Replica("replica0", engine, 1)
+    replica.checkouts = 0
+    replica.checkins = 0
+
+    @event.listens_for(engine.sync_engine, "checkout")
+    def count_checkout(*args):
+        replica.checkouts += 1
+
+    @event.listens_for(engine.sync_engine, "checkin")
+    def count_checkin(*args):
+        replica.checkins += 1
+
+    replica_router.replicas = [replica]
+    response_cache.invalidate()
+    try:
+        yield replica
+    finally:
+        replica_router.replicas = []
+        replica_router._pinned.clear()
+        response_cache.invalidate()
+        client.cookies.clear()
+        client.portal.call(engine.dispose)
+
+
+def test_cached_response_does_not_check_out_replica(client, user_headers, manager_headers, replica):
+    animal = create_animal(client, manager_headers)
+    client.cookies.clear()
+    replica_router._pinned.clear()
+    path = f"/api/animals/{animal['id']}"
+
+    checkouts = replica.checkouts
+    response = client.get(path, headers=user_headers)
+    assert response.status_code == 200
+    assert replica.reads == 1
+    # 每个读请求只取出一次副本连接，请求结束后归还
+    assert replica.checkouts == checkouts + 1
+    assert replica.checkins == replica.checkouts
+    checkouts = replica.checkouts
+
+    # 命中缓存 (包括 304) 的请求不执行查询，也不取出副本连接
+    cached = client.get(path, headers=user_headers)
+    assert cached.status_code == 200
+    not_modified = client.get(path, headers={**user_headers, "If-None-Match": response.headers["etag"]})
+    assert not_modified.status_code == 304
+    assert replica.checkouts == checkouts
+    assert replica.reads == 1
+
+
+def test_write_pins_reads_with_cookie(client, manager_headers, replica):
+    animal = create_animal(client, manager_headers)
+    assert PIN_COOKIE in client.cookies
+    path = f"/api/animals/{animal['id']}"
+
+    # 其他工作进程没有进程内记录，只能通过 Cookie 识别刚写入的客户端
+    replica_router._pinned.clear()
+    for _ in range(2):
+        response = client.get(path, headers=manager_headers)
+        assert response.status_code == 200
+    assert replica.reads == 0
+    assert response_cache.stats()["bypassed"] >= 2
+    assert response_cache.stats()["size"] == 0
+
+    client.cookies.clear()
+    assert client.get(path, headers=manager_headers).status_code == 200
+    assert replica.reads == 1
+
+
+def test_unreachable_replica_falls_back_to_primary(client, user_headers, manager_headers, replica, tmp_dir):
+    animal = create_animal(client, manager_headers)
+    client.cookies.clear()
+    replica_router._pinned.clear()
+    broken_url = f"sqlite+aiosqlite:///{os.path.join(tmp_dir, 'missing', 'replica.sqlite3')}"
+    broken = Replica("replica1", create_async_engine(broken_url), 1)
+    replica_router.replicas = [broken]
+    primary_reads = replica_router.primary_reads
+    try:
+        response = client.get(f"/api/animals/{animal['id']}", headers=user_headers)
+        assert response.status_code == 200
+        assert response.json()["id"] == animal["id"]
+        assert broken.failures == 1 and broken.reads == 0
+        assert replica_router.primary_reads == primary_reads + 1
+    finally:
+        client.portal.call(broken.engine.dispose)
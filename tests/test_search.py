@@ -0,0 +1,95 @@
+import pytest
+from sqlalchemy import delete, insert, update
+
+from app.db.database import async_engine, engine
+from app.models import Animal, Photo
+from app.routers.animals import response_cache
+from app.utils.animal_search import AnimalSearch, animal_search
+from conftest import create_animal
+
+
+def test_search_returns_list_fields_with_best_photo(client, manager_headers):
+    named = create_animal(client, manager_headers, nickname="搜索三花", characteristics="长毛")
+    described = create_animal(client, manager_headers, characteristics="一只搜索三花")
+    with engine.begin() as conn:
+        photo_id = conn.execute(insert(Photo).values(
+            animal_id=named["id"], user_id=1, photo_url="https://example.com/search.jpg", verified=True,
+        )).inserted_primary_key[0]
+    response = client.put(
+        f"/api/animals/{named['id']}/best-photo", json={"photo_id": photo_id}, headers=manager_headers
+    )
+    assert response.status_code == 200
+
+    response = client.get("/api/animals/search", params={"q": "搜索三花"}, headers=manager_headers)
+    assert response.status_code == 200
+    results = response.json()
+    # 昵称命中的排在特征命中的前面
+    assert [animal["id"] for animal in results] == [named["id"], described["id"]]
+    assert results[0]["best_photo"]["id"] == photo_id
+    assert results[1]["best_photo"] is None
+    # 与列表相同，默认不返回不限长度的 Text 列
+    assert "characteristics" not in results[0]
+
+    response = client.get(
+        "/api/animals/search", params={"q": "搜索三花", "fields": "name,characteristics"}, headers=manager_headers
+    )
+    assert response.json() == [
+        {"id": named["id"], "name": named["name"], "characteristics": "长毛"},
+        {"id": described["id"], "name": described["name"], "characteristics": "一只搜索三花"},
+    ]
+
+
+@pytest.mark.parametrize("params", [
+    {}, {"q": ""}, {"q": "   "}, {"q": "猫" * 101}, {"q": "猫", "limit": 0}, {"q": "猫", "limit": 101},
+])
+def test_search_parameters_validated(client, user_headers, params):
+    response = client.get("/api/animals/search", params=params, headers=user_headers)
+    assert response.status_code == 422
+
+
+def test_search_parameters_documented(client):
+    parameters = {
+        parameter["name"]: parameter["schema"]
+        for parameter in client.get("/openapi.json").json()["paths"]["/api/animals/search"]["get"]["parameters"]
+    }
+    assert parameters["q"]["maxLength"] == 100
+    assert parameters["limit"]["minimum"] == 1 and parameters["limit"]["maximum"] == 100
+
+
+def search_ids(client, headers, q: str) -> list:
+    response_cache.invalidate()
+    response = client.get("/api/animals/search", params={"q": q}, headers=headers)
+    assert response.status_code == 200
+    return [animal["id"] for animal in response.json()]
+
+
+def test_rebuild_applies_changes_from_other_processes(client, manager_headers):
+    renamed = create_animal(client, manager_headers, nickname="重建狸花")
+    deleted = create_animal(client, manager_headers, nickname="重建狸花")
+    assert search_ids(client, manager_headers, "重建狸花") == [renamed["id"], deleted["id"]]
+
+    # 其他进程的修改与删除不经过本进程的 ORM 事件
+    with engine.begin() as conn:
+        conn.execute(update(Animal).filter(Animal.id == renamed["id"]).values(nickname="重建橘猫"))
+        conn.execute(delete(Animal).filter(Animal.id == deleted["id"]))
+    assert search_ids(client, manager_headers, "重建橘猫") == []
+
+    client.portal.call(animal_search.rebuild, async_engine)
+    assert search_ids(client, manager_headers, "重建橘猫") == [renamed["id"]]
+    assert search_ids(client, manager_headers, "重建狸花") == []
+
+
+def test_rebuild_keeps_writes_committed_during_rebuild(client, manager_headers, monkeypatch):
+    animal = create_animal(client, manager_headers, nickname="重建奶牛")
+    catch_up = AnimalSearch.catch_up
+
+    async def catch_up_then_write(self, db, index=None):
+        await catch_up(self, db, index)
+        # 构建读取完成后、替换索引前，本进程提交了修改
+        self.apply({animal["id"]: {"name": animal["name"], "nickname": "重建三花"}})
+
+    monkeypatch.setattr(AnimalSearch, "catch_up", catch_up_then_write)
+    client.portal.call(animal_search.rebuild, async_engine)
+    monkeypatch.undo()
+    assert animal_search.index.search(["重建三花"], 10) == [animal["id"]]
+    assert animal_search.index.search(["重建奶牛"], 10) == []
@@ -0,0 +1,61 @@
+from app.db.database import async_engine
+from app.utils.auth import decode_access_token
+from app.utils.token_revocation import TokenRevocations, token_revocations
+from conftest import PASSWORD, create_user
+
+
+def login(client, headers: dict) -> dict:
+    """以同一用户重新登录，返回新的 Bearer 认证头"""
+    email = decode_access_token(headers["Authorization"].split()[1])["sub"]
+    response = client.post("/api/login", json={"email": email, "password": PASSWORD})
+    assert response.status_code == 200
+    client.cookies.clear()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def payload(headers: dict) -> dict:
+    return decode_access_token(headers["Authorization"].split()[1])
+
+
+def test_logout_revokes_token(client):
+    headers = create_user(client)
+    other = login(client, headers)
+    assert client.get("/api/me", headers=headers).status_code == 200
+
+    assert client.post("/api/logout", headers=headers).status_code == 200
+    client.cookies.clear()
+    assert client.get("/api/me", headers=headers).status_code == 401
+    # 只吊销本次登出的令牌
+    assert client.get("/api/me", headers=other).status_code == 200
+
+
+def test_logout_all_revokes_earlier_tokens(client):
+    first = create_user(client)
+    second = login(client, first)
+
+    assert client.post("/api/logout-all", headers=first).status_code == 200
+    client.cookies.clear()
+    assert client.get("/api/me", headers=first).status_code == 401
+    assert client.get("/api/me", headers=second).status_code == 401
+
+    # 紧接着登录的令牌 iat (带小数) 晚于记录的 issued_before，不受影响
+    fresh = login(client, first)
+    assert client.get("/api/me", headers=fresh).status_code == 200
+
+    # 其他进程从表中读取 issued_before (双精度) 后得到相同的判断
+    synced = TokenRevocations()
+    client.portal.call(synced.sync, async_engine)
+    assert synced.is_revoked(payload(second))
+    assert not synced.is_revoked(payload(fresh))
+
+
+def test_expired_revocations_purged_on_revoke(client):
+    headers = create_user(client)
+    token_revocations._jtis["expired-jti"] = 0.0
+    token_revocations._cutoffs["expired@example.com"] = (0.0, 0.0)
+
+    assert client.post("/api/logout", headers=headers).status_code == 200
+    client.cookies.clear()
+    assert "expired-jti" not in token_revocations._jtis
+    assert "expired@example.com" not in token_revocations._cutoffs
+    assert payload(headers)["jti"] in token_revocations._jtis